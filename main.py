@@ -1,16 +1,23 @@
 import os
-import tempfile
+import asyncio
+import atexit
+import hashlib
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
-from typing import Optional, Dict, Any
-from fastapi import FastAPI, File, UploadFile, Form, Request, HTTPException, Depends, Header
-from fastapi.responses import HTMLResponse, StreamingResponse
+from typing import Optional, Dict, Any, Callable, Awaitable, FrozenSet
+from fastapi import FastAPI, File, UploadFile, Form, Request, HTTPException, Depends, Header, BackgroundTasks
+from fastapi.responses import HTMLResponse, StreamingResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from sse_starlette.sse import EventSourceResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
+from starlette_compress import CompressMiddleware, remove_compress_type
+from cachetools import TTLCache
 import uvicorn
+import orjson
 
 from services.file_processor import FileProcessor
 from services.ai_analyzer import AIAnalyzer
@@ -18,27 +25,58 @@ from services.firebase_client import FirebaseClient
 from services.notification_service import NotificationService
 from services.pinecone_rag_service import PineconeRAGService
 from services.contract_chat_service import ContractChatService
-from services.telegram_service import TelegramService
+from services.telegram_service import TelegramService, TelegramReplyStream
 from services.voice_legal_service import VoiceLegalService
+from services.semantic_cache import SemanticCache
+from services.redis_client import close_redis
+from services.http_client import close_http_client
 from models.contract_analysis import ContractAnalysisResponse
 from utils.validators import validate_file_type
+from utils.keyword_matcher import KeywordMatcher
+from utils.lazy_service import LazyService
+from utils.body_size_limit import BodySizeLimitMiddleware
+
+# Log records are handed to a background thread, so request handlers never block on stdout
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)], force=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Contract Review",
     description="AI-powered contract analysis and review system",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# Add middleware
+# Uploads are copied to disk in fixed-size chunks instead of being read whole
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+# Room for the multipart framing and form fields around the file
+MAX_REQUEST_BODY_SIZE = MAX_UPLOAD_SIZE + 64 * 1024
+
+# Add middleware (the last one added runs first)
+# Stop receiving oversized bodies before Starlette spools them to disk
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=MAX_REQUEST_BODY_SIZE)
+# zstd/brotli at low levels (gzip fallback): better ratio than gzip for less CPU.
+# Anything past a kilobyte (analysis JSON, the index page) is worth compressing
+app.add_middleware(CompressMiddleware, minimum_size=1024, zstd_level=4, brotli_quality=4, gzip_level=4)
+# Keep SSE streams uncompressed so events reach the client immediately
+remove_compress_type('text/event-stream')
+# CORS is outermost so preflight requests are answered before compression is set up
+# FRONTEND_URL (comma-separated) pins the allowed origins; without it any origin is allowed
+_CORS_ORIGINS = [origin.strip() for origin in os.environ.get("FRONTEND_URL", "").split(",") if origin.strip()] or ["*"]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=_CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
-app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -46,19 +84,191 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Templates
 templates = Jinja2Templates(directory="templates")
 
-# Initialize services
-file_processor = FileProcessor()
-ai_analyzer = AIAnalyzer()
-firebase_client = FirebaseClient()
-notification_service = NotificationService()
-rag_service = PineconeRAGService()
-chat_service = ContractChatService()
-telegram_service = TelegramService()
-voice_legal_service = VoiceLegalService()
+# Firebase web config injected into the main page, rendered once from the environment.
+# tojson escapes the values for an inline script, so env vars can't break out of it
+_FB_PROJECT = os.environ.get('FIREBASE_PROJECT_ID', '')
+_FIREBASE_CONFIG = {
+    "apiKey": os.environ.get('FIREBASE_API_KEY', ''),
+    "authDomain": f"{_FB_PROJECT}.firebaseapp.com",
+    "projectId": _FB_PROJECT,
+    "storageBucket": f"{_FB_PROJECT}.appspot.com",
+    "appId": os.environ.get('FIREBASE_APP_ID', '')
+}
+_FIREBASE_CONFIG_SCRIPT = templates.env.from_string("""
+    <script>
+        window.firebaseConfig = {{ firebase_config | tojson }};
+    </script>
+    """).render(firebase_config=_FIREBASE_CONFIG)
+
+def _render_index_html(timestamp: str) -> bytes:
+    """Read index.html and inject the cache-busting script and Firebase config"""
+    with open("index.html", "r") as f:
+        html_content = f.read()
+
+    # Force content change to bust Replit webview cache
+    html_content = html_content.replace('CACHE BUSTED VERSION 2024', f'CACHE BUSTED VERSION {timestamp}')
+
+    # Insert cache-busting script and Firebase config before closing </head> tag
+    cache_bust_script = f"""
+    <script>
+        // Force reload of cached content
+        if (!sessionStorage.getItem('cache_cleared_{timestamp}')) {{
+            sessionStorage.setItem('cache_cleared_{timestamp}', 'true');
+            if ('caches' in window) {{
+                caches.keys().then(names => {{
+                    names.forEach(name => caches.delete(name));
+                }});
+            }}
+            window.location.reload(true);
+        }}
+    </script>
+    {_FIREBASE_CONFIG_SCRIPT}
+    """
+
+    html_content = html_content.replace('</head>', f'{cache_bust_script}</head>')
+    return html_content.encode('utf-8')
+
+# Render the main page once at startup; the file and the Firebase env vars don't
+# change while the process is running, so the cache-busting timestamp is per deploy
+_INDEX_TIMESTAMP = str(int(datetime.now().timestamp()))
+_INDEX_HTML: bytes = _render_index_html(_INDEX_TIMESTAMP)
+# A stable digest: hash() is salted per process, so workers would disagree
+_INDEX_CONTENT_HASH = hashlib.sha256(_INDEX_HTML).hexdigest()[:16]
+_INDEX_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate, max-age=0, private",
+    "Pragma": "no-cache",
+    "Expires": "0",
+    "Last-Modified": datetime.now().strftime("%a, %d %b %Y %H:%M:%S GMT"),
+    "ETag": f'"{_INDEX_TIMESTAMP}-{_INDEX_CONTENT_HASH}"',
+    "Vary": "*",
+    "X-Timestamp": _INDEX_TIMESTAMP,
+    "X-Content-Hash": _INDEX_CONTENT_HASH,
+}
+
+# Initialize services lazily: importing main.py builds no SDK clients, and the
+# startup hook constructs them off the event loop before requests are served
+file_processor = LazyService(FileProcessor)
+ai_analyzer = LazyService(AIAnalyzer)
+firebase_client = LazyService(FirebaseClient)
+notification_service = LazyService(NotificationService)
+rag_service = LazyService(PineconeRAGService)
+chat_service = LazyService(ContractChatService)
+telegram_service = LazyService(TelegramService)
+voice_legal_service = LazyService(VoiceLegalService)
+SERVICES = (
+    file_processor, ai_analyzer, firebase_client, notification_service,
+    rag_service, chat_service, telegram_service, voice_legal_service
+)
+# Reuse chat answers for near-duplicate questions
+chat_cache = SemanticCache(
+    lambda texts: rag_service._get_embeddings(texts),
+    max_entries=int(os.environ.get("SEMANTIC_CACHE_MAX_ENTRIES", "1024"))
+)
+
+# Telegram queries waiting to be embedded ahead of their semantic cache lookup (best effort)
+EMBEDDING_PREFETCH_QUEUE_SIZE = 1000
+
+async def run_embedding_prefetch(queue: asyncio.Queue):
+    """Embed queued Telegram queries in batches while their requests are still being routed; runs until cancelled"""
+    while True:
+        texts = [await queue.get()]
+        # Everything that queued up during the previous call goes out in one request
+        while not queue.empty() and len(texts) < PineconeRAGService.EMBEDDING_BATCH_SIZE:
+            texts.append(queue.get_nowait())
+        try:
+            if rag_service.is_available():
+                await rag_service._get_embeddings(texts)
+        except Exception as e:
+            logger.warning("Embedding prefetch failed: %s", e)
+
+def build_services():
+    """Construct every service; blocking (Pinecone index setup, tiktoken encoding downloads)"""
+    # One at a time: the shared HTTP and Redis client getters aren't thread-safe
+    for service in SERVICES:
+        service.get()
+
+@app.on_event("startup")
+async def start_background_workers():
+    """Build the services, then start the periodic Firestore bulk-write flush and the Telegram embedding prefetch"""
+    # Built here rather than on first use, so no request stalls the event loop on SDK setup
+    await asyncio.to_thread(build_services)
+    app.state.firestore_flush_task = asyncio.create_task(firebase_client.run_flush_loop())
+    app.state.embedding_prefetch_queue = asyncio.Queue(maxsize=EMBEDDING_PREFETCH_QUEUE_SIZE)
+    app.state.embedding_prefetch_task = asyncio.create_task(run_embedding_prefetch(app.state.embedding_prefetch_queue))
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    """Stop the background tasks, send any queued Firestore writes and close pooled connections"""
+    app.state.firestore_flush_task.cancel()
+    app.state.embedding_prefetch_task.cancel()
+    await firebase_client.close()
+    # Services that were never used have nothing to close
+    if rag_service.is_initialized:
+        await rag_service.close()
+    if file_processor.is_initialized:
+        file_processor.close()
+    # Owns the OpenAI connection pool every AsyncOpenAI client shares
+    await close_http_client()
+    await close_redis()
 
 # Security
 security = HTTPBearer(auto_error=False)
 
+async def _iter_upload(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    """Yield the uploaded file in chunks of at most chunk_size bytes"""
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+async def _check_upload(file: UploadFile) -> str:
+    """
+    Validate an upload's type and size, reading it through once to hash its content
+    
+    The upload is already a SpooledTemporaryFile (in memory up to 1 MB, on disk
+    beyond), so it is handed to the file processor directly instead of being
+    copied to a named temporary file.
+    
+    Args:
+        file: The uploaded file
+    
+    Returns:
+        SHA-256 hex digest of the content; the file is rewound for reading
+    
+    Raises:
+        HTTPException: If the file type is unsupported or the file is over MAX_UPLOAD_SIZE
+    """
+    if not file.filename or not validate_file_type(file.filename):
+        raise HTTPException(
+            status_code=400, 
+            detail="Invalid file type. Only PDF and DOCX files are supported."
+        )
+    
+    # Reject on the declared size before reading anything
+    if file.size and file.size > MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail="File size too large. Maximum size is 10MB."
+        )
+    
+    received = 0
+    content_hash = hashlib.sha256()
+    async for chunk in _iter_upload(file):
+        received += len(chunk)
+        # The size header can be missing or wrong, so also cap what is actually received
+        if received > MAX_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail="File size too large. Maximum size is 10MB."
+            )
+        content_hash.update(chunk)
+    await file.seek(0)
+    return content_hash.hexdigest()
+
+def _to_dict(obj: Any) -> Dict[str, Any]:
+    """Convert a Pydantic model (or plain dict) to a JSON-ready dict"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    return obj
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     Dependency to get current user from Firebase ID token
@@ -68,11 +278,11 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         return None
     
     try:
-        # Verify Firebase ID token
+        # Verify Firebase ID token (cached by the client until shortly before expiry)
         user_info = await firebase_client.verify_user(credentials.credentials)
         return user_info
     except Exception as e:
-        print(f"Auth verification failed: {str(e)}")
+        logger.warning("Auth verification failed: %s", e)
         return None
 
 async def require_auth(user = Depends(get_current_user)):
@@ -91,62 +301,16 @@ async def require_auth(user = Depends(get_current_user)):
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """Serve the RAG chat interface as main page with Firebase config"""
-    with open("index.html", "r") as f:
-        html_content = f.read()
-    
-    # Inject Firebase configuration into the HTML
-    firebase_config = f"""
-    <script>
-        window.firebaseConfig = {{
-            apiKey: "{os.environ.get('FIREBASE_API_KEY', '')}",
-            authDomain: "{os.environ.get('FIREBASE_PROJECT_ID', '')}.firebaseapp.com",
-            projectId: "{os.environ.get('FIREBASE_PROJECT_ID', '')}",
-            storageBucket: "{os.environ.get('FIREBASE_PROJECT_ID', '')}.appspot.com",
-            appId: "{os.environ.get('FIREBASE_APP_ID', '')}"
-        }};
-    </script>
-    """
-    
-    # Add timestamp for cache busting  
-    timestamp = str(int(datetime.now().timestamp()))
-    
-    # Force content change to bust Replit webview cache
-    html_content = html_content.replace('CACHE BUSTED VERSION 2024', f'CACHE BUSTED VERSION {timestamp}')
-    
-    # Insert cache-busting script and Firebase config before closing </head> tag
-    cache_bust_script = f"""
-    <script>
-        // Force reload of cached content
-        if (!sessionStorage.getItem('cache_cleared_{timestamp}')) {{
-            sessionStorage.setItem('cache_cleared_{timestamp}', 'true');
-            if ('caches' in window) {{
-                caches.keys().then(names => {{
-                    names.forEach(name => caches.delete(name));
-                }});
-            }}
-            window.location.reload(true);
-        }}
-    </script>
-    {firebase_config}
-    """
-    
-    html_content = html_content.replace('</head>', f'{cache_bust_script}</head>')
+    # Re-read index.html on every request while developing so edits show up immediately
+    if os.getenv("ENV") == "dev":
+        return HTMLResponse(content=_render_index_html(_INDEX_TIMESTAMP), headers=_INDEX_HEADERS)
     
-    # Create response with aggressive cache-busting headers
-    response = HTMLResponse(content=html_content)
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate, max-age=0, private"
-    response.headers["Pragma"] = "no-cache" 
-    response.headers["Expires"] = "0"
-    response.headers["Last-Modified"] = datetime.now().strftime("%a, %d %b %Y %H:%M:%S GMT")
-    response.headers["ETag"] = f'"{timestamp}-{hash(html_content)}"'
-    response.headers["Vary"] = "*"
-    response.headers["X-Timestamp"] = timestamp
-    response.headers["X-Content-Hash"] = str(hash(html_content))
-    
-    return response
+    # Pre-rendered at startup, served with aggressive cache-busting headers
+    return HTMLResponse(content=_INDEX_HTML, headers=_INDEX_HEADERS)
 
 @app.post("/analyze")
 async def analyze_contract(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     email: str = Form(..., description="Email is required for notifications"),
     jurisdiction: str = Form(..., description="Jurisdiction is required (e.g., 'US-NY', 'CA-ON')"),
@@ -165,81 +329,62 @@ async def analyze_contract(
         ContractAnalysisResponse: Structured analysis results
     """
     try:
-        # Validate file type
-        if not file.filename or not validate_file_type(file.filename):
-            raise HTTPException(
-                status_code=400, 
-                detail="Invalid file type. Only PDF and DOCX files are supported."
-            )
+        # Validate type and size, reading the upload through once
+        await _check_upload(file)
+        filename = file.filename
         
-        # Validate file size (10MB limit)
-        if file.size and file.size > 10 * 1024 * 1024:
+        # Extract text from file
+        extracted_text = await file_processor.extract_text(file.file, filename)
+        
+        if not extracted_text.strip():
             raise HTTPException(
                 status_code=400,
-                detail="File size too large. Maximum size is 10MB."
+                detail="No text could be extracted from the file. Please ensure the file is not corrupted or password-protected."
             )
         
-        # Create temporary file
-        filename = file.filename or "unknown"
-        file_extension = filename.split('.')[-1] if '.' in filename else 'txt'
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
+        # Analyze contract with AI
         try:
-            # Extract text from file
-            extracted_text = await file_processor.extract_text(temp_file_path, filename)
-            
-            if not extracted_text.strip():
-                raise HTTPException(
-                    status_code=400,
-                    detail="No text could be extracted from the file. Please ensure the file is not corrupted or password-protected."
-                )
-            
-            # Analyze contract with AI
-            try:
-                analysis_result = await ai_analyzer.analyze_contract(
-                    extracted_text, 
-                    jurisdiction=jurisdiction,
-                    contract_type=contract_type
-                )
-            except Exception as ai_error:
-                print(f"AI Analysis Error: {str(ai_error)}")
-                return {
-                    "error": f"Analysis failed: {str(ai_error)}",
-                    "risk_score": 5,
-                    "summary": "Unable to complete analysis due to technical issue",
-                    "risky_clauses": [],
-                    "missing_protections": [],
-                    "detailed_analysis": "Analysis service temporarily unavailable"
-                }
-            
-            # Store analysis in Firebase
-            document_id = await firebase_client.store_analysis(
-                analysis_result if isinstance(analysis_result, dict) else analysis_result.dict(),
-                filename,
-                email
+            analysis_result = await ai_analyzer.analyze_contract(
+                extracted_text, 
+                jurisdiction=jurisdiction,
+                contract_type=contract_type
             )
-            
-            # Add document ID to response if analysis_result has dict method
-            if hasattr(analysis_result, 'document_id'):
-                analysis_result.document_id = document_id
-            
-            # Send notification if email provided
-            if email:
-                await notification_service.send_analysis_notification(
-                    email, 
-                    analysis_result, 
-                    filename
-                )
-            
-            return analysis_result
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+        except Exception as ai_error:
+            logger.error("AI Analysis Error: %s", ai_error)
+            return {
+                "error": f"Analysis failed: {str(ai_error)}",
+                "risk_score": 5,
+                "summary": "Unable to complete analysis due to technical issue",
+                "risky_clauses": [],
+                "missing_protections": [],
+                "detailed_analysis": "Analysis service temporarily unavailable"
+            }
+        
+        # Serialize once; the stored copy and the response share this dict
+        analysis_data = _to_dict(analysis_result)
+        
+        # Store analysis in Firebase
+        document_id = await firebase_client.store_analysis(
+            analysis_data,
+            filename,
+            email
+        )
+        
+        # Add document ID to response if analysis_result has dict method
+        if hasattr(analysis_result, 'document_id'):
+            analysis_result.document_id = document_id
+        
+        # Send notification if email provided (after the response is returned)
+        if email:
+            background_tasks.add_task(
+                notification_service.send_analysis_notification,
+                email, 
+                analysis_result, 
+                filename
+            )
+        
+        # Shallow copy so the queued Firestore write is left untouched
+        return ORJSONResponse(content={**analysis_data, "document_id": document_id})
                 
     except HTTPException:
         raise
@@ -277,83 +422,88 @@ async def upload_contract(
         Upload status and metadata
     """
     try:
-        # Validate file type
-        if not file.filename or not validate_file_type(file.filename):
-            raise HTTPException(
-                status_code=400, 
-                detail="Invalid file type. Only PDF and DOCX files are supported."
+        # Validate type and size, hashing the content on the way through
+        content_hash = await _check_upload(file)
+        filename = file.filename
+        user_email = user.get('email', email) if user else email
+        
+        # Same file already processed for this user: its chunks are in the index,
+        # so skip extraction and embedding
+        existing_doc = await firebase_client.find_document_by_hash(content_hash, user_email)
+        if existing_doc:
+            contract_id = await firebase_client.store_contract_submission(
+                email=user_email,
+                jurisdiction=jurisdiction,
+                contract_type=contract_type,
+                customContractType=customContractType,
+                customJurisdiction=customJurisdiction,
+                filename=filename
             )
+            return {
+                "status": "success",
+                "duplicate": True,
+                "filename": filename,
+                "doc_id": existing_doc.get("doc_id"),
+                "chunks_created": 0,
+                "email": email,
+                "jurisdiction": jurisdiction,
+                "contract_type": contract_type,
+                "contract_id": contract_id,
+                "document_metadata_id": existing_doc.get("id")
+            }
         
-        # Validate file size (10MB limit)
-        if file.size and file.size > 10 * 1024 * 1024:
+        # Extract text from file
+        extracted_text = await file_processor.extract_text(file.file, filename)
+        
+        if not extracted_text.strip():
             raise HTTPException(
                 status_code=400,
-                detail="File size too large. Maximum size is 10MB."
+                detail="No text could be extracted from the file. Please ensure the file is not corrupted or password-protected."
             )
         
-        # Create temporary file
-        filename = file.filename or "unknown"
-        file_extension = filename.split('.')[-1] if '.' in filename else 'txt'
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
+        # Upload to RAG service with metadata
+        upload_result = await rag_service.upload_contract(
+            extracted_text, 
+            filename,
+            email=email,
+            jurisdiction=jurisdiction,
+            contract_type=contract_type
+        )
         
-        try:
-            # Extract text from file
-            extracted_text = await file_processor.extract_text(temp_file_path, filename)
-            
-            if not extracted_text.strip():
-                raise HTTPException(
-                    status_code=400,
-                    detail="No text could be extracted from the file. Please ensure the file is not corrupted or password-protected."
-                )
-            
-            # Upload to RAG service with metadata
-            upload_result = await rag_service.upload_contract(
-                extracted_text, 
-                filename,
-                email=email,
-                jurisdiction=jurisdiction,
-                contract_type=contract_type
-            )
-            
-            # Context info is now stored in RAG service during upload
-            upload_result.update({
-                "email": email,
-                "jurisdiction": jurisdiction,
-                "contract_type": contract_type
-            })
-            
-            # Store secure contract submission in 'contracts' collection
-            user_email = user.get('email', email) if user else email
-            contract_id = await firebase_client.store_contract_submission(
+        # Context info is now stored in RAG service during upload
+        upload_result.update({
+            "email": email,
+            "jurisdiction": jurisdiction,
+            "contract_type": contract_type
+        })
+        
+        # Store secure contract submission in 'contracts' collection and, for
+        # backward compatibility, legacy document metadata; the writes are independent
+        vector_id = f"vector_{datetime.now().timestamp()}"
+        contract_id, doc_meta_id = await asyncio.gather(
+            firebase_client.store_contract_submission(
                 email=user_email,
                 jurisdiction=jurisdiction,
                 contract_type=contract_type,
                 customContractType=customContractType,
                 customJurisdiction=customJurisdiction,
                 filename=filename
-            )
-            
-            # Also store legacy document metadata for backward compatibility
-            vector_id = f"vector_{datetime.now().timestamp()}"
-            doc_meta_id = await firebase_client.store_document_metadata(
+            ),
+            firebase_client.store_document_metadata(
                 filename=filename,
                 email=user_email,
                 jurisdiction=jurisdiction,
                 contract_type=contract_type,
-                vector_id=vector_id
+                vector_id=vector_id,
+                # Only successfully indexed uploads can be reused by later duplicates
+                content_hash=content_hash if upload_result.get("status") == "success" else None,
+                doc_id=upload_result.get("doc_id")
             )
-            
-            upload_result["contract_id"] = contract_id
-            upload_result["document_metadata_id"] = doc_meta_id
-            return upload_result
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+        )
+        
+        upload_result["contract_id"] = contract_id
+        upload_result["document_metadata_id"] = doc_meta_id
+        return upload_result
                 
     except HTTPException:
         raise
@@ -363,8 +513,34 @@ async def upload_contract(
             "error": f"Upload failed: {str(e)}"
         }
 
+# Consistent system message for all /chat responses; kept byte-identical across
+# requests so the request-specific text is isolated in the user message
+_CHAT_SYSTEM_MESSAGE = """You are a legal contract assistant. Always respond in consistent Markdown format:
+
+- Use **bold** for important terms, headings, or field labels.
+- Use *italics* only for emphasis, not headings.
+- Use numbered lists for step-by-step instructions.
+- Do not mix HTML tags with Markdown.
+- Ensure uniform spacing, line breaks, and no random bolding.
+- Avoid inline code formatting unless showing actual code snippets.
+- If providing examples, maintain the same Markdown structure throughout the response.
+
+Return your output strictly in Markdown. Any tables, lists, or headings must follow standard Markdown syntax."""
+
+# Exact-match /chat response caches; greeting replies don't depend on the
+# jurisdiction or contract type, so they are keyed on the query alone and kept longer
+_chat_response_cache = TTLCache(maxsize=2048, ttl=6 * 3600)
+_greeting_response_cache = TTLCache(maxsize=256, ttl=24 * 3600)
+_chat_cache_lock = asyncio.Lock()
+
+def _chat_cache_key(query: str, jurisdiction: Optional[str] = None, contract_type: Optional[str] = None) -> bytes:
+    """Build a compact cache key from the normalized query and its context"""
+    raw = f"{query.strip().lower()}|{jurisdiction or ''}|{contract_type or ''}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
 @app.post("/chat")
 async def chat_simple(
+    background_tasks: BackgroundTasks,
     query: str = Form(...),
     jurisdiction: Optional[str] = Form(None),
     contract_type: Optional[str] = Form(None),
@@ -376,44 +552,41 @@ async def chat_simple(
         greeting_words = ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening', 'greetings']
         is_greeting = any(word in query.lower() for word in greeting_words)
         
-        # Consistent system message for all responses
-        system_message = """You are a legal contract assistant. Always respond in consistent Markdown format:
-
-- Use **bold** for important terms, headings, or field labels.
-- Use *italics* only for emphasis, not headings.
-- Use numbered lists for step-by-step instructions.
-- Do not mix HTML tags with Markdown.
-- Ensure uniform spacing, line breaks, and no random bolding.
-- Avoid inline code formatting unless showing actual code snippets.
-- If providing examples, maintain the same Markdown structure throughout the response.
-
-Return your output strictly in Markdown. Any tables, lists, or headings must follow standard Markdown syntax."""
-
+        # Serve repeated questions from the response cache
         if is_greeting:
-            user_message = f"User said: '{query}'. Please provide a professional welcome message for our AI Contract Review service using proper Markdown formatting."
+            response_cache, cache_key = _greeting_response_cache, _chat_cache_key(query)
         else:
-            # Focus on the actual user question, only mention jurisdiction/contract type if relevant
-            context_info = ""
-            if jurisdiction and jurisdiction.strip():
-                context_info += f" (Context: Jurisdiction: {jurisdiction})"
-            if contract_type and contract_type.strip():
-                context_info += f" (Context: Contract type: {contract_type})"
+            response_cache, cache_key = _chat_response_cache, _chat_cache_key(query, jurisdiction, contract_type)
+        async with _chat_cache_lock:
+            full_response = response_cache.get(cache_key)
+        
+        # Then look for a paraphrase of an earlier question
+        query_vector = None
+        if full_response is None and not is_greeting:
+            full_response, query_vector = await chat_cache.lookup(query, "chat", jurisdiction, contract_type)
+            if full_response is not None:
+                async with _chat_cache_lock:
+                    response_cache[cache_key] = full_response
+        
+        if full_response is None:
+            if is_greeting:
+                user_message = f"User said: '{query}'. Please provide a professional welcome message for our AI Contract Review service using proper Markdown formatting."
+            else:
+                # Focus on the actual user question, only mention jurisdiction/contract type if relevant
+                context_info = ""
+                if jurisdiction and jurisdiction.strip():
+                    context_info += f" (Context: Jurisdiction: {jurisdiction})"
+                if contract_type and contract_type.strip():
+                    context_info += f" (Context: Contract type: {contract_type})"
+                
+                user_message = f"Please answer this specific contract question: {query}{context_info}. Focus on answering the user's actual question about contracts or legal terms. Use proper Markdown formatting in your response."
             
-            user_message = f"Please answer this specific contract question: {query}{context_info}. Focus on answering the user's actual question about contracts or legal terms. Use proper Markdown formatting in your response."
-        
-        # Use OpenAI directly with GPT-4o mini and temperature 0.4
-        from openai import OpenAI
-        import asyncio
-        
-        openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-        
-        # Add timeout wrapper
-        async def make_openai_request():
+            # Use the shared async OpenAI client with GPT-4o mini and temperature 0.4
             try:
-                response = openai_client.chat.completions.create(
+                response = await rag_service.openai_async_client.chat.completions.create(
                     model="gpt-4o-mini",
                     messages=[
-                        {"role": "system", "content": system_message},
+                        {"role": "system", "content": _CHAT_SYSTEM_MESSAGE},
                         {"role": "user", "content": user_message}
                     ],
                     stream=False,
@@ -421,48 +594,169 @@ Return your output strictly in Markdown. Any tables, lists, or headings must fol
                     temperature=0.4,
                     timeout=15  # 15 second timeout
                 )
-                return response
             except Exception as e:
-                print(f"OpenAI request failed: {str(e)}")
-                return None
-        
-        response = await asyncio.wait_for(make_openai_request(), timeout=20.0)
-        
-        if response and response.choices:
-            full_response = response.choices[0].message.content or "I apologize, but I couldn't generate a response."
-        else:
-            full_response = "I apologize, but I'm experiencing technical difficulties. Please try again."
-        
-        # Store chat history (simplified, ignore errors)
-        try:
-            user_email = user.get('email', 'anonymous') if user else 'anonymous'
-            await firebase_client.store_chat_history(
-                email=user_email,
-                user_question=query,
-                ai_response=full_response,
-                retrieved_chunks=[],
-                jurisdiction=jurisdiction,
-                contract_type=contract_type
-            )
-        except:
-            pass  # Ignore Firebase errors
+                logger.error("OpenAI request failed: %s", e)
+                response = None
+            
+            if response and response.choices and response.choices[0].message.content:
+                full_response = response.choices[0].message.content
+                async with _chat_cache_lock:
+                    response_cache[cache_key] = full_response
+                await chat_cache.store(query, query_vector, full_response, "chat", jurisdiction, contract_type)
+            elif response and response.choices:
+                full_response = "I apologize, but I couldn't generate a response."
+            else:
+                full_response = "I apologize, but I'm experiencing technical difficulties. Please try again."
+        
+        # Store chat history after the response is sent (errors are logged by the client)
+        user_email = user.get('email', 'anonymous') if user else 'anonymous'
+        background_tasks.add_task(
+            firebase_client.store_chat_history,
+            email=user_email,
+            user_question=query,
+            ai_response=full_response,
+            retrieved_chunks=[],
+            jurisdiction=jurisdiction,
+            contract_type=contract_type
+        )
         
         return {"response": full_response}
         
     except Exception as e:
-        print(f"Chat error: {str(e)}")
+        logger.error("Chat error: %s", e)
         return {"response": "I apologize, but I encountered an error. Please try again."}
 
+# Keyword lists used to route Telegram messages; all of them are matched as
+# substrings in a single pass by QUERY_MATCHER
+CONTRACT_KEYWORDS = frozenset({
+    # Direct contract terms
+    "contract", "agreement", "nda", "clause", "terms", "conditions", "legal",
+    "liability", "indemnity", "termination", "breach", "compliance", "negotiate",
+    
+    # Contract abbreviations
+    "sla", "msa", "sow", "loi", "mou", "nca", "cda", "eula", "tos", "dpa", "baa",
+    
+    # Legal concepts
+    "law", "legal", "attorney", "lawyer", "court", "litigation", "dispute",
+    "jurisdiction", "governing", "statute", "regulation", "rights", "obligations",
+    
+    # Business/contract actions
+    "sign", "execute", "amend", "modify", "review", "analyze", "risk", "audit",
+    "due diligence", "merger", "acquisition", "partnership", "vendor", "supplier",
+    
+    # Document types
+    "employment", "lease", "rental", "purchase", "sale", "service", "licensing",
+    "confidentiality", "non-disclosure", "intellectual property", "copyright",
+    "trademark", "patent", "warranty", "guarantee", "insurance", "policy",
+    
+    # Financial/commercial terms
+    "payment", "invoice", "penalty", "damages", "compensation", "fee", "price",
+    "cost", "budget", "financial", "commercial", "business", "corporate",
+    
+    # Risk and analysis terms
+    "risky", "dangerous", "problematic", "unfair", "unreasonable", "standard",
+    "market", "industry", "benchmark", "best practice", "recommendation"
+})
+
+# Common command patterns that should be treated as contract-related
+COMMAND_PATTERNS = frozenset({"help", "/help", "start", "/start", "hello", "hi", "hey", "test", "what can you do", "commands"})
+
+# Questions about the service itself
+SERVICE_PATTERNS = frozenset({"what do you do", "what can you help", "how do you work", "what is this"})
+
+LEGAL_QUESTION_KEYWORDS = frozenset({"sla", "contract", "agreement", "nda", "msa", "legal", "clause", "terms", "constructing", "analyze", "review"})
+
+CONVERSATIONAL_PATTERNS = frozenset({
+    # Basic greetings (exact match)
+    "hi", "hello", "hey", "hi there", "hello there", "hey there", "hi!", "hello!", "hey!",
+    
+    # Greetings and social interactions
+    "how are you", "how's it going", "what's up", "how are things", "what are you up to", 
+    "good morning", "good afternoon", "good evening", "nice to meet",
+    
+    # Farewells
+    "goodbye", "bye", "see you later", "take care", "see you", "talk to you later", 
+    "have a good day", "have a nice day", "until next time", "catch you later",
+    
+    # Introductions
+    "i am", "my name is", "i'm", "call me", "this is", "nice to meet you",
+    "pleased to meet", "good to meet",
+    
+    # Thanks and appreciation
+    "thank you", "thanks", "appreciate it", "much appreciated", "thank you so much"
+})
+
+HELP_PATTERNS = frozenset({"help", "/help", "what can you do", "commands", "what do you do"})
+
+NON_CONTRACT_INDICATORS = frozenset({
+    "weather", "joke", "recipe", "cook", "food", "movie", "music", "game", 
+    "sports", "news", "time", "date", "math", "calculate", "translate",
+    "directions", "travel", "shopping", "restaurant", "hotel", "flight"
+})
+
+# Narrower list used by the webhook's early filter
+WEBHOOK_NON_CONTRACT_WORDS = frozenset({"weather", "joke", "recipe", "cook", "food", "movie", "music", "game", "sports", "news"})
+
+CONTRACT_WORDS = frozenset({"contract", "agreement", "legal", "sla", "msa", "nda", "clause", "terms", "service level"})
+
+# Messages answered with the canned greeting (exact match)
+TELEGRAM_GREETINGS = frozenset({"hello", "hi", "hey", "start", "/start"})
+
+# Fixed Telegram replies, defined once instead of rebuilt in each handler
+TELEGRAM_RESPONSES = {
+    "greeting": "Hi! I'm Lexi, I help with legal stuff. What can I do for you?\n\n📄 **Upload contract documents** for detailed analysis and risk assessment!",
+    "non_contract_chat": "I can definitely chat about that, but remember I'm here mainly to help with contracts and legal info! 😊",
+    "help_fallback": "I help with legal questions and contract review! Ask me about clauses, terms, or upload your contracts for analysis. What can I help you with?",
+    "purpose": """Hi there! 👋 I'm Lexi, your friendly legal assistant. I can help explain contracts, review clauses, and answer general legal questions.
+
+📄 **Upload your contract documents** for detailed analysis and risk assessment!
+
+I can also answer general legal questions. How can I assist you today?
+
+Disclaimer: For informational use only. Please consult an attorney for your specific case.""",
+}
+
+QUERY_MATCHER = KeywordMatcher({
+    "contract": CONTRACT_KEYWORDS,
+    "command": COMMAND_PATTERNS,
+    "service": SERVICE_PATTERNS,
+    "legal_question": LEGAL_QUESTION_KEYWORDS,
+    "conversational": CONVERSATIONAL_PATTERNS,
+    "help": HELP_PATTERNS,
+    "non_contract": NON_CONTRACT_INDICATORS,
+    "webhook_non_contract": WEBHOOK_NON_CONTRACT_WORDS,
+    "contract_word": CONTRACT_WORDS,
+})
+
+# Single-category matcher for the plain "is this off-topic?" check
+NON_CONTRACT_MATCHER = KeywordMatcher({"non_contract": NON_CONTRACT_INDICATORS})
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace; the form every keyword check runs on"""
+    return " ".join(query.lower().split())
+
+def will_embed_query_text(query_lower: str, matched: FrozenSet[str]) -> bool:
+    """Whether process_telegram_query embeds the raw message (the legal and help semantic cache lookups)"""
+    if "legal_question" in matched:
+        return True
+    # Greetings and canned replies return before the help path; conversational
+    # messages are answered by general chat with the conversation prepended
+    if "help" not in matched or "conversational" in matched:
+        return False
+    if query_lower != "help" and query_lower in telegram_service.get_dummy_responses():
+        return False
+    return query_lower not in TELEGRAM_GREETINGS
+
 @app.post("/telegram_webhook")
-async def telegram_webhook(request: Request):
-    """Telegram webhook endpoint to receive and process messages"""
+async def telegram_webhook(request: Request, background_tasks: BackgroundTasks):
+    """Telegram webhook endpoint to receive messages; replies are sent after the update is acknowledged"""
     try:
         if not telegram_service.is_available():
             return {"status": "error", "message": "Telegram service not available"}
         
         # Parse incoming Telegram update
-        telegram_update = await request.json()
-        print(f"Received Telegram update: {telegram_update}")
+        telegram_update = orjson.loads(await request.body())
+        logger.debug("Received Telegram update: %s", telegram_update)
         
         # Extract message data
         message_data = telegram_service.extract_message_data(telegram_update)
@@ -475,142 +769,131 @@ async def telegram_webhook(request: Request):
         if not chat_id or not user_query:
             return {"status": "ok", "message": "Invalid message data"}
         
-        print(f"Processing query from chat {chat_id}: {user_query}")
+        logger.info("Processing query from chat %s: %s", chat_id, user_query)
         
-        # EMERGENCY OVERRIDE: Block non-contract queries immediately
-        user_query_lower = user_query.lower()
-        non_contract_words = ["weather", "joke", "recipe", "cook", "food", "movie", "music", "game", "sports", "news"]
-        contract_words = ["contract", "agreement", "legal", "sla", "msa", "nda", "clause", "terms", "service level"]
+        # EMERGENCY OVERRIDE: Block non-contract queries immediately. The message is
+        # classified once here and the reply pipeline reuses the result
+        matched = QUERY_MATCHER.categories(normalize_query(user_query))
         
         # Only block if contains non-contract words AND no contract words
-        has_non_contract = any(word in user_query_lower for word in non_contract_words)
-        has_contract = any(word in user_query_lower for word in contract_words)
+        has_non_contract = "webhook_non_contract" in matched
+        has_contract = "contract_word" in matched
         
         if has_non_contract and not has_contract:
-            clean_response = "I can definitely chat about that, but remember I'm here mainly to help with contracts and legal info! 😊"
-            
-            await telegram_service.send_message(chat_id, clean_response)
+            background_tasks.add_task(telegram_service.send_message, chat_id, TELEGRAM_RESPONSES["non_contract_chat"])
             return {"status": "ok", "message": "Non-contract query handled"}
         
+        # Start embedding the query now so the vector is ready (or in flight) by the
+        # time routing and the typing indicator are done; only for messages whose
+        # text will actually be embedded as-is
+        prefetch_queue = app.state.embedding_prefetch_queue
+        if not prefetch_queue.full() and will_embed_query_text(normalize_query(user_query), matched):
+            prefetch_queue.put_nowait(user_query)
+        
+        # Acknowledge the update right away; Telegram re-delivers updates that take
+        # too long, and answering can take several seconds of LLM calls
+        background_tasks.add_task(reply_to_telegram_message, chat_id, user_query, message_data, matched)
+        return {"status": "ok", "message": "Processing"}
+            
+    except Exception as e:
+        logger.exception("Telegram webhook error: %s", e)
+        return {"status": "error", "message": str(e)}
+
+async def reply_to_telegram_message(
+    chat_id: int,
+    user_query: str,
+    message_data: Dict[str, Any],
+    matched: Optional[FrozenSet[str]] = None
+):
+    """Answer a Telegram message and send the reply to the chat"""
+    try:
         # Send typing indicator only (like web chat)
         await telegram_service.send_typing_action(chat_id)
         
-        # Process the query through RAG system with test mode fallback
-        response_text = await process_telegram_query(user_query, message_data)
+        # Process the query through RAG system with test mode fallback; free-form
+        # answers appear in the chat while they are generated
+        reply = TelegramReplyStream(telegram_service, chat_id)
+        response_text = await process_telegram_query(user_query, message_data, on_partial=reply.update, matched=matched)
         
-        # Send response directly (no duplicate waiting message)
-        print(f"DEBUG: About to send response: {response_text[:100]}...")
-        send_result = await telegram_service.send_message(chat_id, response_text)
-        print(f"DEBUG: Send result: {send_result}")
+        # Send the final response (replacing the streamed partial, if any)
+        logger.debug("About to send response: %.100s...", response_text)
+        send_result = await reply.finish(response_text)
+        logger.debug("Send result: %s", send_result)
         
         if send_result.get("success"):
-            print(f"Response sent successfully to chat {chat_id}")
-            return {"status": "ok", "message": "Response sent"}
+            logger.info("Response sent successfully to chat %s", chat_id)
         else:
-            print(f"Failed to send response: {send_result.get('error')}")
-            return {"status": "error", "message": f"Failed to send response: {send_result.get('error')}"}
+            logger.error("Failed to send response: %s", send_result.get("error"))
             
     except Exception as e:
-        print(f"Telegram webhook error: {str(e)}")
-        return {"status": "error", "message": str(e)}
+        logger.exception("Telegram reply error: %s", e)
 
 def is_contract_related_query(query: str) -> bool:
     """Check if a query is related to contracts, legal matters, or document analysis"""
-    query_lower = query.lower().strip()
-    
-    # Contract-related keywords
-    contract_keywords = [
-        # Direct contract terms
-        "contract", "agreement", "nda", "clause", "terms", "conditions", "legal",
-        "liability", "indemnity", "termination", "breach", "compliance", "negotiate",
-        
-        # Contract abbreviations
-        "sla", "msa", "sow", "loi", "mou", "nca", "cda", "eula", "tos", "dpa", "baa",
-        
-        # Legal concepts
-        "law", "legal", "attorney", "lawyer", "court", "litigation", "dispute",
-        "jurisdiction", "governing", "statute", "regulation", "rights", "obligations",
-        
-        # Business/contract actions
-        "sign", "execute", "amend", "modify", "review", "analyze", "risk", "audit",
-        "due diligence", "merger", "acquisition", "partnership", "vendor", "supplier",
-        
-        # Document types
-        "employment", "lease", "rental", "purchase", "sale", "service", "licensing",
-        "confidentiality", "non-disclosure", "intellectual property", "copyright",
-        "trademark", "patent", "warranty", "guarantee", "insurance", "policy",
-        
-        # Financial/commercial terms
-        "payment", "invoice", "penalty", "damages", "compensation", "fee", "price",
-        "cost", "budget", "financial", "commercial", "business", "corporate",
-        
-        # Risk and analysis terms
-        "risky", "dangerous", "problematic", "unfair", "unreasonable", "standard",
-        "market", "industry", "benchmark", "best practice", "recommendation"
-    ]
-    
-    # Common command patterns that should be treated as contract-related
-    command_patterns = ["help", "/help", "start", "/start", "hello", "hi", "hey", "test", "what can you do", "commands"]
-    
-    # Check if query contains contract keywords
-    if any(keyword in query_lower for keyword in contract_keywords):
-        return True
-    
-    # Check if it's a help/command pattern (always allow these)
-    if any(pattern in query_lower for pattern in command_patterns):
-        return True
-    
-    # Check for questions about the service itself
-    service_patterns = ["what do you do", "what can you help", "how do you work", "what is this"]
-    if any(pattern in query_lower for pattern in service_patterns):
-        return True
-    
-    return False
+    # Contract keywords, help/command patterns (always allowed) and questions about the service
+    matched = QUERY_MATCHER.categories(normalize_query(query))
+    return bool(matched & {"contract", "command", "service"})
 
 def get_friendly_purpose_statement() -> str:
     """Return a friendly statement about the bot's purpose for irrelevant queries"""
-    return """Hi there! 👋 I'm Lexi, your friendly legal assistant. I can help explain contracts, review clauses, and answer general legal questions.
-
-📄 **Upload your contract documents** for detailed analysis and risk assessment!
+    return TELEGRAM_RESPONSES["purpose"]
 
-I can also answer general legal questions. How can I assist you today?
-
-Disclaimer: For informational use only. Please consult an attorney for your specific case."""
-
-async def process_telegram_query(query: str, message_data: Dict[str, Any]) -> str:
-    """Process a query through RAG system with relevance checking and test mode fallback"""
+async def process_telegram_query(
+    query: str,
+    message_data: Dict[str, Any],
+    on_partial: Optional[Callable[[str], Awaitable[Any]]] = None,
+    matched: Optional[FrozenSet[str]] = None
+) -> str:
+    """
+    Process a query through RAG system with relevance checking and test mode fallback
+    
+    Args:
+        query: The user's message
+        message_data: Message fields extracted from the Telegram update
+        on_partial: Optional callback streamed free-form chat answers as they are generated
+        matched: QUERY_MATCHER categories of the normalized query, if already computed
+    
+    Returns:
+        The reply text
+    """
     try:
-        query_lower = query.lower().strip()
+        query_lower = normalize_query(query)
         chat_id = message_data.get("chat_id", 0)
+        if matched is None:
+            matched = QUERY_MATCHER.categories(query_lower)
         
         # FIRST: Check if this is a legal term explanation query
         legal_term_response = await telegram_service.handle_legal_term_query(query)
         if legal_term_response:
-            telegram_service.add_to_conversation_history(chat_id, "user", query)
-            telegram_service.add_to_conversation_history(chat_id, "assistant", legal_term_response)
+            await telegram_service.add_to_conversation_history(chat_id, "user", query)
+            await telegram_service.add_to_conversation_history(chat_id, "assistant", legal_term_response)
             return legal_term_response
         
         # SECOND: Check if this is a legal question - handle immediately  
-        legal_keywords = ["sla", "contract", "agreement", "nda", "msa", "legal", "clause", "terms", "constructing", "analyze", "review"]
-        is_legal_question = any(keyword in query_lower for keyword in legal_keywords)
+        is_legal_question = "legal_question" in matched
         
         if is_legal_question:
-            # Handle legal questions directly with chat service
+            # Handle legal questions directly with chat service; they don't depend
+            # on the conversation, so answers are shared through the semantic cache
             try:
-                chat_result = await chat_service.general_chat(
+                chat_result = await chat_cache.get_or_compute(
                     query,
-                    jurisdiction=None,
-                    contract_type=None,
-                    force_natural_response=True
+                    lambda: chat_service.general_chat(
+                        query,
+                        jurisdiction=None,
+                        contract_type=None,
+                        force_natural_response=True
+                    ),
+                    namespace="telegram_chat"
                 )
                 
                 if chat_result.get("answer"):
                     response = chat_result['answer']
-                    telegram_service.add_to_conversation_history(chat_id, "user", query)
-                    telegram_service.add_to_conversation_history(chat_id, "assistant", response)
+                    await telegram_service.add_to_conversation_history(chat_id, "user", query)
+                    await telegram_service.add_to_conversation_history(chat_id, "assistant", response)
                     return response
             except Exception as e:
-                print(f"Legal question error: {e}")
+                logger.error("Legal question error: %s", e)
         
         # Handle basic greetings and commands
         dummy_responses = telegram_service.get_dummy_responses()
@@ -618,49 +901,25 @@ async def process_telegram_query(query: str, message_data: Dict[str, Any]) -> st
         # Check exact matches (but skip "help" - handle it conversationally)
         if query_lower in dummy_responses and query_lower != "help":
             response = dummy_responses[query_lower]
-            telegram_service.add_to_conversation_history(chat_id, "user", query)
-            telegram_service.add_to_conversation_history(chat_id, "assistant", response)
+            await telegram_service.add_to_conversation_history(chat_id, "user", query)
+            await telegram_service.add_to_conversation_history(chat_id, "assistant", response)
             return response
         
         # Check for common greeting patterns - force exact dummy response
-        greetings = ["hello", "hi", "hey", "start", "/start"]
-        if any(greeting == query_lower for greeting in greetings):  # Exact match
-            response = "Hi! I'm Lexi, I help with legal stuff. What can I do for you?\n\n📄 **Upload contract documents** for detailed analysis and risk assessment!"
-            telegram_service.add_to_conversation_history(chat_id, "user", query)
-            telegram_service.add_to_conversation_history(chat_id, "assistant", response)
+        if query_lower in TELEGRAM_GREETINGS:  # Exact match
+            response = TELEGRAM_RESPONSES["greeting"]
+            await telegram_service.add_to_conversation_history(chat_id, "user", query)
+            await telegram_service.add_to_conversation_history(chat_id, "assistant", response)
             return response
         
-        # Check if this is actually a legal/contract question first
-        legal_keywords = ["sla", "contract", "agreement", "nda", "msa", "legal", "clause", "terms", "constructing", "analyze", "review"]
-        is_legal_question = any(keyword in query_lower for keyword in legal_keywords)
-        
         # Handle conversational queries naturally (but NOT if it's a legal question)
-        conversational_patterns = [
-            # Basic greetings (exact match)
-            "hi", "hello", "hey", "hi there", "hello there", "hey there", "hi!", "hello!", "hey!",
-            
-            # Greetings and social interactions
-            "how are you", "how's it going", "what's up", "how are things", "what are you up to", 
-            "good morning", "good afternoon", "good evening", "nice to meet",
-            
-            # Farewells
-            "goodbye", "bye", "see you later", "take care", "see you", "talk to you later", 
-            "have a good day", "have a nice day", "until next time", "catch you later",
-            
-            # Introductions
-            "i am", "my name is", "i'm", "call me", "this is", "nice to meet you",
-            "pleased to meet", "good to meet",
-            
-            # Thanks and appreciation
-            "thank you", "thanks", "appreciate it", "much appreciated", "thank you so much"
-        ]
-        pattern_matched = any(pattern in query_lower for pattern in conversational_patterns)
+        pattern_matched = "conversational" in matched
         if pattern_matched and not is_legal_question:
-            print(f"DEBUG: Matched conversational pattern for '{query}'")
+            logger.debug("Matched conversational pattern for %r", query)
             # Let the AI respond naturally to conversational queries
             try:
                 # Get conversation context for natural responses
-                temp_context = telegram_service.get_conversation_context(chat_id)
+                temp_context = await telegram_service.get_conversation_context(chat_id)
                 context_query = query
                 if temp_context:
                     context_query = f"Previous conversation:\n{temp_context}\n\nCurrent question: {query}"
@@ -669,85 +928,96 @@ async def process_telegram_query(query: str, message_data: Dict[str, Any]) -> st
                     context_query,
                     jurisdiction=None,  # Don't pass legal context for natural conversation
                     contract_type=None,  # Don't pass legal context for natural conversation
-                    force_natural_response=True  # New parameter for natural responses
+                    force_natural_response=True,  # New parameter for natural responses
+                    on_partial=on_partial
                 )
                 
                 if chat_result.get("answer"):
                     response = chat_result['answer']
-                    telegram_service.add_to_conversation_history(chat_id, "user", query)
-                    telegram_service.add_to_conversation_history(chat_id, "assistant", response)
+                    await telegram_service.add_to_conversation_history(chat_id, "user", query)
+                    await telegram_service.add_to_conversation_history(chat_id, "assistant", response)
                     return response
             except Exception as e:
-                print(f"Natural response error: {e}")
+                logger.error("Natural response error: %s", e)
                 pass  # Fall through to normal processing
         
         # Handle help/capability questions conversationally
-        help_patterns = ["help", "/help", "what can you do", "commands", "what do you do"]
-        if any(pattern in query_lower for pattern in help_patterns):
+        if "help" in matched:
             try:
-                chat_result = await chat_service.general_chat(
+                chat_result = await chat_cache.get_or_compute(
                     query,
-                    jurisdiction=None,
-                    contract_type=None,
-                    force_natural_response=True
+                    lambda: chat_service.general_chat(
+                        query,
+                        jurisdiction=None,
+                        contract_type=None,
+                        force_natural_response=True
+                    ),
+                    namespace="telegram_chat"
                 )
                 
                 if chat_result.get("answer"):
                     response = chat_result['answer']
-                    telegram_service.add_to_conversation_history(chat_id, "user", query)
-                    telegram_service.add_to_conversation_history(chat_id, "assistant", response)
+                    await telegram_service.add_to_conversation_history(chat_id, "user", query)
+                    await telegram_service.add_to_conversation_history(chat_id, "assistant", response)
                     return response
             except Exception as e:
-                print(f"Help question error: {e}")
+                logger.error("Help question error: %s", e)
                 # Try simple fallback response instead of dummy
-                response = "I help with legal questions and contract review! Ask me about clauses, terms, or upload your contracts for analysis. What can I help you with?"
-                telegram_service.add_to_conversation_history(chat_id, "user", query)
-                telegram_service.add_to_conversation_history(chat_id, "assistant", response)
+                response = TELEGRAM_RESPONSES["help_fallback"]
+                await telegram_service.add_to_conversation_history(chat_id, "user", query)
+                await telegram_service.add_to_conversation_history(chat_id, "assistant", response)
                 return response
         
-        # Add user message to conversation history
-        telegram_service.add_to_conversation_history(chat_id, "user", query)
+        # Get conversation context for follow-up detection; read before this turn is
+        # recorded so standalone questions come back with an empty context
+        conversation_context = await telegram_service.get_conversation_context(chat_id)
         
-        # Get conversation context for follow-up detection  
-        conversation_context = telegram_service.get_conversation_context(chat_id)
+        # Add user message to conversation history
+        await telegram_service.add_to_conversation_history(chat_id, "user", query)
         
         # Check if this could be a follow-up question
         is_followup = False
         if conversation_context and len(query.split()) < 10:
-            context_lower = conversation_context.lower()
-            contract_words = ["contract", "agreement", "legal", "sla", "msa", "nda", "clause", "terms", "service level"]
-            if any(word in context_lower for word in contract_words):
+            if "contract_word" in QUERY_MATCHER.categories(conversation_context.lower()):
                 is_followup = True
         
         # IMMEDIATE FILTER: Check if query is definitely NOT contract-related
-        query_words = query_lower.split()
-        non_contract_indicators = [
-            "weather", "joke", "recipe", "cook", "food", "movie", "music", "game", 
-            "sports", "news", "time", "date", "math", "calculate", "translate",
-            "directions", "travel", "shopping", "restaurant", "hotel", "flight"
-        ]
-        
         # Only block if contains non-contract words AND no contract words
-        contract_words = ["contract", "agreement", "legal", "sla", "msa", "nda", "clause", "terms", "service level"]
-        has_non_contract = any(indicator in query_lower for indicator in non_contract_indicators)
-        has_contract = any(word in query_lower for word in contract_words)
+        has_non_contract = "non_contract" in matched
+        has_contract = "contract_word" in matched
         
         # (is_followup already determined above)
         
         if has_non_contract and not has_contract and not is_followup:
             response = get_friendly_purpose_statement()
-            telegram_service.add_to_conversation_history(chat_id, "assistant", response)
+            await telegram_service.add_to_conversation_history(chat_id, "assistant", response)
             return response
         
-        # Also check with original function, but allow follow-ups
-        if not is_contract_related_query(query) and not is_followup:
+        # Also apply the general contract-relevance check, but allow follow-ups
+        if not (matched & {"contract", "command", "service"}) and not is_followup:
             response = get_friendly_purpose_statement()
-            telegram_service.add_to_conversation_history(chat_id, "assistant", response)
+            await telegram_service.add_to_conversation_history(chat_id, "assistant", response)
             return response
         
-        # Try RAG system if available, otherwise use chat service
+        # Try RAG system if available, otherwise use chat service. Only queries with a
+        # contract signal (or follow-ups to one) are worth a Pinecone round trip;
+        # questions about the bot itself go straight to general chat
+        use_rag = ("contract" in matched or is_followup) and rag_service.is_available()
         try:
-            if rag_service.is_available():
+            if use_rag:
+                jurisdiction = message_data.get("jurisdiction")
+                contract_type = message_data.get("contract_type")
+                
+                # Standalone questions can reuse answers to similar earlier ones;
+                # entries are scoped to the current index contents
+                cache_namespace = f"telegram_rag:{await rag_service.get_index_version()}"
+                query_vector = None
+                if not conversation_context:
+                    cached_response, query_vector = await chat_cache.lookup(query, cache_namespace, jurisdiction, contract_type)
+                    if cached_response is not None:
+                        await telegram_service.add_to_conversation_history(chat_id, "assistant", cached_response)
+                        return cached_response
+                
                 # Add conversation context if available
                 context_query = query
                 if conversation_context:
@@ -756,11 +1026,13 @@ async def process_telegram_query(query: str, message_data: Dict[str, Any]) -> st
                 # Use RAG service for document-based queries
                 rag_result = await rag_service.ask_contract(
                     context_query,
-                    jurisdiction=message_data.get("jurisdiction"),
-                    contract_type=message_data.get("contract_type")
+                    jurisdiction=jurisdiction,
+                    contract_type=contract_type
                 )
                 response = telegram_service.format_rag_response(rag_result, query)
-                telegram_service.add_to_conversation_history(chat_id, "assistant", response)
+                if "error" not in rag_result and not conversation_context:
+                    await chat_cache.store(query, query_vector, response, cache_namespace, jurisdiction, contract_type)
+                await telegram_service.add_to_conversation_history(chat_id, "assistant", response)
                 return response
             else:
                 # Add conversation context if available
@@ -773,24 +1045,25 @@ async def process_telegram_query(query: str, message_data: Dict[str, Any]) -> st
                     context_query,
                     jurisdiction=message_data.get("jurisdiction"),
                     contract_type=message_data.get("contract_type"),
-                    force_natural_response=True  # Always use natural responses
+                    force_natural_response=True,  # Always use natural responses
+                    on_partial=on_partial
                 )
                 
                 if chat_result.get("answer"):
                     response = chat_result['answer']  # No robotic prefix
-                    telegram_service.add_to_conversation_history(chat_id, "assistant", response)
+                    await telegram_service.add_to_conversation_history(chat_id, "assistant", response)
                     return response
                 else:
                     response = dummy_responses["default"]
-                    telegram_service.add_to_conversation_history(chat_id, "assistant", response)
+                    await telegram_service.add_to_conversation_history(chat_id, "assistant", response)
                     return response
                     
         except Exception as e:
-            print(f"RAG/Chat service error: {str(e)}")
+            logger.exception("RAG/Chat service error: %s", e)
             return f"🤖 I understand you're asking about: *{query}*\n\nI'm currently operating in test mode. Once document ingestion is complete, I'll provide detailed analysis based on your uploaded contracts!\n\n💡 Try typing 'help' or 'test' to see what I can do."
         
     except Exception as e:
-        print(f"Query processing error: {str(e)}")
+        logger.exception("Query processing error: %s", e)
         return f"❌ *Error processing your query*: {str(e)}\n\n💡 Try typing 'help' for available commands."
 
 
@@ -798,7 +1071,7 @@ async def process_telegram_query(query: str, message_data: Dict[str, Any]) -> st
 async def debug_telegram_flow(request: Request):
     """Debug what exact response is generated for a query"""
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
         query = data.get("query", "")
         
         # Simulate message data with persistent chat ID
@@ -827,13 +1100,7 @@ async def test_filter():
     
     # Test the exact same logic as telegram processing
     query_lower = test_query.lower().strip()
-    non_contract_indicators = [
-        "weather", "joke", "recipe", "cook", "food", "movie", "music", "game", 
-        "sports", "news", "time", "date", "math", "calculate", "translate",
-        "directions", "travel", "shopping", "restaurant", "hotel", "flight"
-    ]
-    
-    should_filter = any(indicator in query_lower for indicator in non_contract_indicators)
+    should_filter = NON_CONTRACT_MATCHER.matches(query_lower)
     
     if should_filter:
         response = get_friendly_purpose_statement()
@@ -854,11 +1121,7 @@ async def deployment_check():
     """Check if latest filtering code is deployed"""
     # This should show if our filtering is active
     test_query = "what is the weather today"
-    has_weather_filter = "weather" in str([
-        "weather", "joke", "recipe", "cook", "food", "movie", "music", "game", 
-        "sports", "news", "time", "date", "math", "calculate", "translate",
-        "directions", "travel", "shopping", "restaurant", "hotel", "flight"
-    ])
+    has_weather_filter = "weather" in NON_CONTRACT_INDICATORS
     
     return {
         "timestamp": "2025-01-27-v3",
@@ -867,6 +1130,22 @@ async def deployment_check():
         "non_contract_indicators_loaded": True
     }
 
+# Status endpoints are polled by dashboards; the Pinecone and Telegram lookups
+# behind them are reused for a few seconds
+STATUS_CACHE_TTL_SECONDS = 5
+_status_cache = TTLCache(maxsize=4, ttl=STATUS_CACHE_TTL_SECONDS)
+# Let pollers and proxies reuse a status response for the same window
+_STATUS_CACHE_HEADERS = {"Cache-Control": f"private, max-age={STATUS_CACHE_TTL_SECONDS}"}
+_HEALTH_CACHE_HEADERS = {"Cache-Control": f"public, max-age={STATUS_CACHE_TTL_SECONDS}"}
+
+async def _cached_status(key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Return a recent status lookup, or run fetch and cache its result"""
+    status = _status_cache.get(key)
+    if status is None:
+        status = await fetch()
+        _status_cache[key] = status
+    return status
+
 @app.get("/telegram_status")
 async def telegram_status():
     """Get Telegram bot status and webhook information"""
@@ -879,7 +1158,7 @@ async def telegram_status():
             }
         
         # Get webhook info
-        webhook_info = await telegram_service.get_webhook_info()
+        webhook_info = await _cached_status("telegram_webhook_info", telegram_service.get_webhook_info)
         
         return {
             "status": "available",
@@ -896,9 +1175,22 @@ async def telegram_status():
             "webhook_url": None
         }
 
-@app.post("/set_telegram_webhook")
-async def set_telegram_webhook(webhook_url: str = Form(...)):
-    """Set the Telegram webhook URL"""
+async def _set_telegram_webhook(
+    webhook_url: str,
+    success_message: str,
+    failure_message: str = "Failed to set webhook"
+) -> Dict[str, Any]:
+    """
+    Point the Telegram bot at a webhook URL (shared by the webhook-setter endpoints)
+    
+    Args:
+        webhook_url: Full URL of the /telegram_webhook endpoint
+        success_message: Message returned when Telegram accepts the URL
+        failure_message: Message returned when Telegram rejects it without a description
+    
+    Returns:
+        Status dict for the endpoint response
+    """
     try:
         if not telegram_service.is_available():
             return {
@@ -911,13 +1203,13 @@ async def set_telegram_webhook(webhook_url: str = Form(...)):
         if result.get("success"):
             return {
                 "status": "success",
-                "message": f"Webhook set to {webhook_url}",
+                "message": success_message,
                 "webhook_url": webhook_url
             }
         else:
             return {
                 "status": "error", 
-                "message": result.get("error", "Failed to set webhook")
+                "message": result.get("error", failure_message)
             }
             
     except Exception as e:
@@ -926,80 +1218,41 @@ async def set_telegram_webhook(webhook_url: str = Form(...)):
             "message": str(e)
         }
 
+@app.post("/set_telegram_webhook")
+async def set_telegram_webhook(webhook_url: str = Form(...)):
+    """Set the Telegram webhook URL"""
+    return await _set_telegram_webhook(webhook_url, f"Webhook set to {webhook_url}")
+
 @app.post("/set_render_webhook")
 async def set_render_webhook():
     """Set Telegram webhook to Render deployment URL (from environment)"""
-    try:
-        if not telegram_service.is_available():
-            return {
-                "status": "error",
-                "message": "Telegram service not available. Check TELEGRAM_BOT_TOKEN."
-            }
-        
-        # Try to get Render URL from environment
-        render_url = os.getenv('RENDER_EXTERNAL_URL')
-        if not render_url:
-            return {
-                "status": "error", 
-                "message": "RENDER_EXTERNAL_URL not set. Use /set_render_webhook_manual instead."
-            }
-        
-        webhook_url = f"{render_url}/telegram_webhook"
-        result = await telegram_service.set_webhook(webhook_url)
-        
-        if result.get("success"):
-            return {
-                "status": "success",
-                "message": f"Webhook set to Render URL: {webhook_url}",
-                "webhook_url": webhook_url
-            }
-        else:
-            return {
-                "status": "error", 
-                "message": result.get("error", "Failed to set webhook to Render URL")
-            }
-    except Exception as e:
+    # Try to get Render URL from environment
+    render_url = os.getenv('RENDER_EXTERNAL_URL')
+    if not render_url:
         return {
-            "status": "error",
-            "message": str(e)
+            "status": "error", 
+            "message": "RENDER_EXTERNAL_URL not set. Use /set_render_webhook_manual instead."
         }
+    
+    webhook_url = f"{render_url}/telegram_webhook"
+    return await _set_telegram_webhook(
+        webhook_url,
+        f"Webhook set to Render URL: {webhook_url}",
+        "Failed to set webhook to Render URL"
+    )
 
 @app.post("/set_render_webhook_manual")
 async def set_render_webhook_manual(render_url: str = Form(...)):
     """Manually set Telegram webhook to provided Render URL"""
-    try:
-        if not telegram_service.is_available():
-            return {
-                "status": "error",
-                "message": "Telegram service not available. Check TELEGRAM_BOT_TOKEN."
-            }
-        
-        # Ensure URL format is correct
-        if not render_url.startswith('https://'):
-            render_url = f"https://{render_url}"
-        
-        # Remove trailing slash if present
-        render_url = render_url.rstrip('/')
-        
-        webhook_url = f"{render_url}/telegram_webhook"
-        result = await telegram_service.set_webhook(webhook_url)
-        
-        if result.get("success"):
-            return {
-                "status": "success",
-                "message": f"Webhook set to: {webhook_url}",
-                "webhook_url": webhook_url
-            }
-        else:
-            return {
-                "status": "error", 
-                "message": result.get("error", "Failed to set webhook")
-            }
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": str(e)
-        }
+    # Ensure URL format is correct
+    if not render_url.startswith('https://'):
+        render_url = f"https://{render_url}"
+    
+    # Remove trailing slash if present
+    render_url = render_url.rstrip('/')
+    
+    webhook_url = f"{render_url}/telegram_webhook"
+    return await _set_telegram_webhook(webhook_url, f"Webhook set to: {webhook_url}")
 
 @app.get("/test-vector")
 async def test_vector_storage():
@@ -1056,28 +1309,8 @@ async def test_vector_storage():
             "pinecone_connection": "failed"
         }
 
-@app.post("/translate_jargon")
-async def translate_jargon(
-    legal_term: str = Form(...),
-    context: Optional[str] = Form(None)
-):
-    """
-    Translate legal jargon into plain English with examples
-    
-    Args:
-        legal_term: The legal term or phrase to translate
-        context: Optional context (contract type, jurisdiction, etc.)
-    
-    Returns:
-        Simple explanation, definition, and practical examples
-    """
-    try:
-        from openai import OpenAI
-        openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-        
-        context_info = f" in the context of {context}" if context else ""
-        
-        system_message = """You are a friendly legal translator that explains complex legal terms in simple, everyday language. 
+# Static system prompt for /translate_jargon
+_TRANSLATE_SYSTEM_MESSAGE = """You are a friendly legal translator that explains complex legal terms in simple, everyday language. 
         
         Your response should be:
         - Clear and easy to understand
@@ -1094,26 +1327,57 @@ async def translate_jargon(
           "why_it_matters": "Why someone should care about this term",
           "common_usage": "Where you'd typically see this term used"
         }"""
-        
-        user_message = f"Please explain the legal term '{legal_term}'{context_info} in simple language that anyone can understand."
-        
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.4,
-            max_tokens=800,
-            response_format={"type": "json_object"}
-        )
-        
-        import json
-        content = response.choices[0].message.content
-        if content:
-            translation = json.loads(content)
-        else:
-            raise Exception("No content received from OpenAI")
+
+# Exact-match /translate_jargon cache; definitions don't go stale, so entries live for a day
+_translation_cache = TTLCache(maxsize=2048, ttl=24 * 3600)
+
+def _translation_cache_key(legal_term: str, context: Optional[str] = None) -> bytes:
+    """Build a cache key from the term and context, ignoring case and extra whitespace"""
+    raw = f"{' '.join(legal_term.lower().split())}|{' '.join((context or '').lower().split())}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+@app.post("/translate_jargon")
+async def translate_jargon(
+    legal_term: str = Form(...),
+    context: Optional[str] = Form(None)
+):
+    """
+    Translate legal jargon into plain English with examples
+    
+    Args:
+        legal_term: The legal term or phrase to translate
+        context: Optional context (contract type, jurisdiction, etc.)
+    
+    Returns:
+        Simple explanation, definition, and practical examples
+    """
+    try:
+        # The same terms are looked up over and over; only an exact term and context match is
+        # reused, since near neighbours ("lessor"/"lessee") need different definitions
+        cache_key = _translation_cache_key(legal_term, context)
+        translation = _translation_cache.get(cache_key)
+        
+        if translation is None:
+            context_info = f" in the context of {context}" if context else ""
+            user_message = f"Please explain the legal term '{legal_term}'{context_info} in simple language that anyone can understand."
+            
+            # Reuse the shared async client instead of opening a new connection pool per request
+            response = await rag_service.openai_async_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": _TRANSLATE_SYSTEM_MESSAGE},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.4,
+                max_tokens=800,
+                response_format={"type": "json_object"}
+            )
+            
+            content = response.choices[0].message.content
+            if not content:
+                raise Exception("No content received from OpenAI")
+            translation = orjson.loads(content)
+            _translation_cache[cache_key] = translation
         
         return {
             "status": "success",
@@ -1122,7 +1386,7 @@ async def translate_jargon(
         }
         
     except Exception as e:
-        print(f"Translation error: {str(e)}")
+        logger.error("Translation error: %s", e)
         return {
             "status": "error",
             "error": "Failed to translate legal term. Please try again."
@@ -1148,12 +1412,18 @@ async def ask_contract(
     try:
         # Use general contract chat for all questions for now
         # (RAG functionality temporarily disabled while fixing FAISS issues)
-        result = await chat_service.general_chat(
-            query=query,
+        result = await chat_cache.get_or_compute(
+            query,
+            lambda: chat_service.general_chat(
+                query=query,
+                jurisdiction=jurisdiction,
+                contract_type=contract_type
+            ),
             jurisdiction=jurisdiction,
             contract_type=contract_type
         )
-        return result
+        # Plain JSON-safe dict; skip FastAPI's jsonable_encoder pass
+        return ORJSONResponse(content=result)
         
     except Exception as e:
         return {
@@ -1179,12 +1449,18 @@ async def chat_general(
         Friendly conversational response with legal guidance
     """
     try:
-        result = await chat_service.general_chat(
-            query=query,
+        result = await chat_cache.get_or_compute(
+            query,
+            lambda: chat_service.general_chat(
+                query=query,
+                jurisdiction=jurisdiction,
+                contract_type=contract_type
+            ),
             jurisdiction=jurisdiction,
             contract_type=contract_type
         )
-        return result
+        # Plain JSON-safe dict; skip FastAPI's jsonable_encoder pass
+        return ORJSONResponse(content=result)
         
     except Exception as e:
         return {
@@ -1196,12 +1472,14 @@ async def chat_general(
 async def get_rag_status(user = Depends(get_current_user)):
     """Get current RAG index statistics (auth optional)"""
     try:
-        stats = rag_service.get_index_stats()
-        return {
+        # describe_index_stats is a blocking Pinecone call
+        stats = await _cached_status("rag_stats", lambda: asyncio.to_thread(rag_service.get_index_stats))
+        return ORJSONResponse(content={
             "status": "healthy",
             "rag_stats": stats,
+            "chat_cache": chat_cache.get_stats(),
             "authenticated": user is not None
-        }
+        }, headers=_STATUS_CACHE_HEADERS)
     except Exception as e:
         return {
             "status": "error",
@@ -1270,11 +1548,11 @@ async def get_user_documents(user = Depends(require_auth)):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {
+    return ORJSONResponse(content={
         "status": "healthy", 
         "service": "ai-contract-review",
         "firebase_connected": firebase_client.db is not None
-    }
+    }, headers=_HEALTH_CACHE_HEADERS)
 
 @app.post("/webhook/stripe")
 async def stripe_webhook(request: Request):
@@ -1327,10 +1605,17 @@ if __name__ == "__main__":
     # Get port from environment (Render sets this) or default to 5000
     port = int(os.environ.get("PORT", 5000))
     
+    # loop/http "auto" pick uvloop and httptools when installed (uvloop has no Windows build)
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=port,
         reload=False,  # Disable reload in production
+        loop="auto",
+        http="auto",
+        # More than one worker needs REDIS_URL so caches and Telegram history are shared
+        workers=int(os.environ.get("WEB_CONCURRENCY", 1)),
+        # Per-request access lines are the costliest logging on the hot path; ACCESS_LOG=false drops them
+        access_log=os.environ.get("ACCESS_LOG", "true").lower() != "false",
         log_level="info"
     )
@@ -1,31 +1,36 @@
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class RiskyClause(BaseModel):
     """Model for representing a risky clause in a contract"""
-    clause_type: str = Field(..., description="Type of risky clause (e.g., 'Termination', 'Liability')")
-    description: str = Field(..., description="Description of why this clause is risky")
-    recommendation: str = Field(..., description="Recommendation for addressing this risk")
+    # Built once from the AI response and only ever read afterwards
+    model_config = ConfigDict(frozen=True)
+    
+    clause_type: str = Field(default="Unknown", description="Type of risky clause (e.g., 'Termination', 'Liability')")
+    description: str = Field(default="", description="Description of why this clause is risky")
+    recommendation: str = Field(default="", description="Recommendation for addressing this risk")
     risk_level: str = Field(default="medium", description="Risk level: low, medium, or high")
 
 class MissingProtection(BaseModel):
     """Model for representing a missing protection in a contract"""
-    protection_type: str = Field(..., description="Type of missing protection")
-    description: str = Field(..., description="Description of what protection is missing")
-    importance: str = Field(..., description="Why this protection is important")
+    model_config = ConfigDict(frozen=True)
+    
+    protection_type: str = Field(default="Unknown", description="Type of missing protection")
+    description: str = Field(default="", description="Description of what protection is missing")
+    importance: str = Field(default="", description="Why this protection is important")
     suggested_clause: str = Field(default="", description="Suggested clause language to add")
 
 class ContractAnalysisResponse(BaseModel):
     """Complete contract analysis response model"""
     risk_score: int = Field(..., ge=1, le=10, description="Overall risk score from 1-10")
     summary: str = Field(..., description="Brief summary of the contract analysis")
-    risky_clauses: List[RiskyClause] = Field(default=[], description="List of identified risky clauses")
-    missing_protections: List[MissingProtection] = Field(default=[], description="List of missing protections")
+    risky_clauses: List[RiskyClause] = Field(default_factory=list, description="List of identified risky clauses")
+    missing_protections: List[MissingProtection] = Field(default_factory=list, description="List of missing protections")
     detailed_analysis: str = Field(..., description="Comprehensive detailed analysis")
     document_id: str = Field(default="", description="Firebase document ID for this analysis")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "risk_score": 7,
                 "summary": "This contract contains several high-risk clauses that heavily favor the other party, with limited protections for your interests.",
@@ -49,6 +54,7 @@ class ContractAnalysisResponse(BaseModel):
                 "document_id": "abc123xyz"
             }
         }
+    )
 
 class AnalysisRequest(BaseModel):
     """Model for contract analysis request"""
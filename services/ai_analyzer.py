@@ -1,20 +1,142 @@
 import os
-import json
 import asyncio
-from typing import Dict, List, Any, Optional
-from openai import OpenAI
-from models.contract_analysis import ContractAnalysisResponse, RiskyClause, MissingProtection
+import hashlib
+import orjson
+import tiktoken
+from cachetools import LRUCache
+from pydantic_core import from_json
+from typing import Dict, List, Any, Optional, Tuple, Union
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+from services.http_client import get_openai_http_client
+from models.contract_analysis import ContractAnalysisResponse
+
+def _object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Strict-mode object schema: every property required, nothing extra allowed"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+def _string(description: str) -> Dict[str, str]:
+    """String property schema with guidance for the model"""
+    return {"type": "string", "description": description}
+
+def _strict_schema(name: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Structured Outputs response_format for a JSON object with these properties"""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": _object(properties)}
+    }
+
+# The model is held to these shapes, so the prompts no longer spell out the JSON
+_RISKY_CLAUSE_PROPERTIES = {
+    "clause_type": _string("Type of risky clause"),
+    "description": _string("Description of the specific clause and why it's risky"),
+    "recommendation": _string("Specific recommendation to address this risk"),
+    "risk_level": {"type": "string", "enum": ["high", "medium", "low"]}
+}
+_MISSING_PROTECTION_PROPERTIES = {
+    "protection_type": _string("Type of missing protection"),
+    "description": _string("Description of what protection is missing"),
+    "importance": _string("Why this protection is important"),
+    "suggested_clause": _string("Suggested clause language to add")
+}
+ANALYSIS_RESPONSE_FORMAT = _strict_schema("contract_analysis", {
+    "risk_score": {"type": "integer", "description": "Integer from 1-10, where 10 is highest risk"},
+    "summary": _string("Brief 2-3 sentence summary of overall contract assessment"),
+    "risky_clauses": {"type": "array", "items": _object(_RISKY_CLAUSE_PROPERTIES)},
+    "missing_protections": {"type": "array", "items": _object(_MISSING_PROTECTION_PROPERTIES)},
+    "detailed_analysis": _string(
+        "Clearly separated paragraphs with \\n\\n between sections, structured as: "
+        "**Key Terms Analysis:**, **Risk Assessment:**, **Missing Protections:**, "
+        "**Recommendations:** and **Overall Assessment:**, 2-3 sentences each"
+    )
+})
+RECOMMENDATIONS_RESPONSE_FORMAT = _strict_schema("contract_recommendations", {
+    "immediate_actions": _string("Most urgent actions to take"),
+    "negotiation_priorities": _string("Key points to focus on during negotiations"),
+    "legal_review_needed": _string("Whether professional legal review is recommended"),
+    "contract_approval": _string("Recommendation on whether to sign as-is, negotiate, or reject")
+})
+
+# Identical on every analysis request and placed first, so OpenAI's prompt cache can
+# reuse the prefix (system prompt, schema, instructions, then the contract itself)
+ANALYSIS_SYSTEM_PROMPT = "You are an expert contract attorney with 20+ years of experience in contract law, risk assessment, and legal document analysis. Provide thorough, accurate, and actionable contract analysis."
+
+ANALYSIS_INSTRUCTIONS = """Please analyze the contract below and provide a comprehensive risk assessment.
+
+Focus on identifying:
+1. Unfair or heavily one-sided terms
+2. Unclear or ambiguous language
+3. Missing standard protections
+4. Excessive liability or penalty clauses
+5. Problematic termination or renewal terms
+6. Intellectual property concerns
+7. Confidentiality and non-disclosure issues
+8. Payment and delivery terms
+9. Dispute resolution mechanisms
+10. Compliance and regulatory considerations
+
+Provide specific, actionable recommendations for each identified issue.
+
+IMPORTANT FORMATTING INSTRUCTIONS FOR detailed_analysis:
+- Use clear section headers with ** bold formatting **
+- Separate sections with double line breaks (\\n\\n)
+- Write in well-structured paragraphs
+- Include specific examples and actionable advice
+- Use bullet points where appropriate
+- Make it readable and professional"""
+
+def _load_json_response(choice) -> Any:
+    """
+    Parse a JSON-mode completion, keeping the usable prefix if it hit max_tokens
+    
+    Args:
+        choice: The completion choice holding the JSON message
+        
+    Returns:
+        The parsed JSON value
+        
+    Raises:
+        ValueError: If the content is not valid JSON
+    """
+    if choice.finish_reason == "length":
+        # Cut off mid-object: jiter closes the open containers and strings
+        return from_json(choice.message.content, allow_partial="trailing-strings")
+    return orjson.loads(choice.message.content)
 
 class AIAnalyzer:
     """Service for AI-powered contract analysis using OpenAI"""
     
+    # Analyses in flight at once; the rest wait their turn instead of tripping rate limits
+    MAX_CONCURRENT_ANALYSES = int(os.environ.get("OPENAI_MAX_CONCURRENT_ANALYSES", "8"))
+    # Recent analyses kept per worker, so re-uploads of the same contract skip the AI call
+    ANALYSIS_CACHE_SIZE = int(os.environ.get("ANALYSIS_CACHE_SIZE", "256"))
+    # Contract tokens sent for analysis; longer contracts keep their opening and closing sections
+    MAX_CONTRACT_TOKENS = 12000
+    
     def __init__(self):
-        self.openai_client = OpenAI(
-            api_key=os.environ.get("OPENAI_API_KEY")
+        # Requests wait on the event loop instead of holding a worker thread each.
+        # The SDK retries 429/5xx/connection errors with jittered backoff, honouring Retry-After
+        self.openai_client = AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            max_retries=int(os.environ.get("OPENAI_MAX_RETRIES", "5")),
+            http_client=get_openai_http_client()
         )
         # Using GPT-4o mini for reliable analysis with proper API support
         # GPT-5 has limited API parameter support causing failures
         self.model = "gpt-4o-mini"
+        self.tokenizer = tiktoken.encoding_for_model(self.model)
+        self._analysis_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_ANALYSES)
+        # Analyses currently running, so concurrent identical requests share one API call
+        self._inflight: Dict[bytes, "asyncio.Task[ContractAnalysisResponse]"] = {}
+        # Analysis key -> ContractAnalysisResponse; 0 disables caching
+        self._analysis_cache: Optional[LRUCache] = (
+            LRUCache(maxsize=self.ANALYSIS_CACHE_SIZE) if self.ANALYSIS_CACHE_SIZE > 0 else None
+        )
     
     async def analyze_contract(
         self, 
@@ -33,146 +155,226 @@ class AIAnalyzer:
         Returns:
             ContractAnalysisResponse: Structured analysis results
         """
+        cache_key = hashlib.blake2b(
+            f"{self.model}|{jurisdiction}|{contract_type}|{contract_text}".encode("utf-8"),
+            digest_size=16
+        ).digest()
+        # Callers set document_id on the result, so each gets its own copy
+        if self._analysis_cache is not None and cache_key in self._analysis_cache:
+            return self._analysis_cache[cache_key].model_copy()
+        
+        # An identical analysis already running (another tab, a retry) is awaited, not repeated
+        task = self._inflight.get(cache_key)
+        if task is not None:
+            return (await asyncio.shield(task)).model_copy()
+        
+        task = asyncio.create_task(self._run_analysis(cache_key, contract_text, jurisdiction, contract_type))
+        self._inflight[cache_key] = task
+        # Unregistered when the analysis itself ends, not when this caller does: a
+        # disconnected client leaves it running, and later callers should still find it
+        task.add_done_callback(lambda done: self._analysis_finished(cache_key, done))
+        # Shielded so a cancelled caller doesn't fail the callers sharing the analysis
+        return (await asyncio.shield(task)).model_copy()
+    
+    def _analysis_finished(self, cache_key: bytes, task: "asyncio.Task[ContractAnalysisResponse]"):
+        """Drop a finished analysis from the in-flight map"""
+        if self._inflight.get(cache_key) is task:
+            del self._inflight[cache_key]
+        # Retrieve the error so an analysis nobody is still awaiting doesn't log it as unhandled
+        if not task.cancelled():
+            task.exception()
+    
+    async def _run_analysis(
+        self,
+        cache_key: bytes,
+        contract_text: str,
+        jurisdiction: Optional[str],
+        contract_type: Optional[str]
+    ) -> ContractAnalysisResponse:
+        """Run one analysis against OpenAI and cache the result under cache_key"""
         try:
-            # Prepare the analysis prompt
-            analysis_prompt = self._build_analysis_prompt(contract_text, jurisdiction, contract_type)
+            # Trim to the token budget; tokenizing a long contract is CPU work, keep it off the event loop
+            contract_text = await asyncio.to_thread(self._fit_token_budget, contract_text)
             
             # Call OpenAI API
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert contract attorney with 20+ years of experience in contract law, risk assessment, and legal document analysis. Provide thorough, accurate, and actionable contract analysis."
-                    },
-                    {
-                        "role": "user",
-                        "content": analysis_prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=4000,
-                temperature=0.3
-            )
-            
-            # Parse the response
-            content = response.choices[0].message.content
-            if not content:
-                raise Exception("AI response was empty")
-            analysis_data = json.loads(content)
+            async with self._analysis_semaphore:
+                response = await self.openai_client.chat.completions.create(
+                    **self._analysis_request(contract_text, jurisdiction, contract_type)
+                )
             
             # Convert to structured response
-            return self._parse_analysis_response(analysis_data)
+            analysis, complete = self._analysis_from_completion(response)
+            # A truncated analysis is still returned, but a retry should get a fresh attempt
+            if self._analysis_cache is not None and complete:
+                self._analysis_cache[cache_key] = analysis
+            return analysis
             
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             raise Exception(f"Failed to parse AI response: {str(e)}")
         except Exception as e:
             raise Exception(f"AI analysis failed: {str(e)}")
     
-    def _build_analysis_prompt(
-        self, 
-        contract_text: str, 
+    def _analysis_request(
+        self,
+        contract_text: str,
         jurisdiction: Optional[str] = None,
         contract_type: Optional[str] = None
-    ) -> str:
-        """Build the comprehensive analysis prompt"""
-        # Build context information for jurisdiction and contract type
-        context_info = ""
-        if jurisdiction:
-            context_info += f"\nJURISDICTION: {jurisdiction}"
-        if contract_type:
-            context_info += f"\nCONTRACT TYPE: {contract_type}"
-        
-        return f"""
-        Please analyze the following contract and provide a comprehensive risk assessment.{context_info}
-        
-        CONTRACT TEXT:
-        {contract_text[:15000]}  # Limit text to avoid token limits
-        
-        Please provide your analysis in the following JSON format:
-        {{
-            "risk_score": <integer from 1-10, where 10 is highest risk>,
-            "summary": "<brief 2-3 sentence summary of overall contract assessment>",
-            "risky_clauses": [
-                {{
-                    "clause_type": "<type of risky clause>",
-                    "description": "<description of the specific clause and why it's risky>",
-                    "recommendation": "<specific recommendation to address this risk>",
-                    "risk_level": "<high|medium|low>"
-                }}
-            ],
-            "missing_protections": [
-                {{
-                    "protection_type": "<type of missing protection>",
-                    "description": "<description of what protection is missing>",
-                    "importance": "<why this protection is important>",
-                    "suggested_clause": "<suggested clause language to add>"
-                }}
+    ) -> Dict[str, Any]:
+        """Chat completion parameters for analysing an already token-budgeted contract"""
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": ANALYSIS_SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": self._build_analysis_prompt(contract_text, jurisdiction, contract_type)
+                }
             ],
-            "detailed_analysis": "CRITICAL: Format this as clearly separated paragraphs using \\n\\n between sections. Structure as:\n\n**Key Terms Analysis:**\n[2-3 sentences about key terms]\n\n**Risk Assessment:**\n[2-3 sentences about risks found]\n\n**Missing Protections:**\n[2-3 sentences about what's missing]\n\n**Recommendations:**\n[2-3 sentences with specific actions]\n\n**Overall Assessment:**\n[2-3 sentences with final conclusion]\n\nUse \\n\\n between each section. Keep each paragraph focused and readable. DO NOT create one long block of text."
-        }}
-        
-        Focus on identifying:
-        1. Unfair or heavily one-sided terms
-        2. Unclear or ambiguous language
-        3. Missing standard protections
-        4. Excessive liability or penalty clauses
-        5. Problematic termination or renewal terms
-        6. Intellectual property concerns
-        7. Confidentiality and non-disclosure issues
-        8. Payment and delivery terms
-        9. Dispute resolution mechanisms
-        10. Compliance and regulatory considerations
+            "response_format": ANALYSIS_RESPONSE_FORMAT,
+            "max_tokens": 4000,
+            "temperature": 0.3
+        }
+    
+    def _analysis_from_completion(self, completion: ChatCompletion) -> Tuple[ContractAnalysisResponse, bool]:
+        """Parse an analysis completion; also returns whether the model finished it (False if it was cut off)"""
+        choice = completion.choices[0]
+        if not choice.message.content:
+            # Structured Outputs reports a refusal instead of content
+            raise Exception(choice.message.refusal or "AI response was empty")
+        return self._parse_analysis_response(_load_json_response(choice)), choice.finish_reason == "stop"
+    
+    async def analyze_contracts_batch(
+        self,
+        items: List[Tuple[str, Optional[str], Optional[str]]]
+    ) -> List[Union[ContractAnalysisResponse, Exception]]:
+        """
+        Analyze several contracts concurrently
         
-        {f"Consider the specific jurisdiction ({jurisdiction}) laws and requirements." if jurisdiction else ""}
-        {f"Focus on issues specific to {contract_type} contracts." if contract_type else ""}
+        Args:
+            items: (contract_text, jurisdiction, contract_type) for each contract
+            
+        Returns:
+            One result per item, in order; a failed analysis is returned as its exception
+        """
+        # analyze_contract holds the semaphore, so this never exceeds MAX_CONCURRENT_ANALYSES
+        return await asyncio.gather(
+            *(self.analyze_contract(text, jurisdiction, contract_type) for text, jurisdiction, contract_type in items),
+            return_exceptions=True
+        )
+    
+    async def submit_batch(self, items: List[Tuple[str, Optional[str], Optional[str]]]) -> str:
+        """
+        Queue contract analyses on the OpenAI Batch API for non-interactive jobs
         
-        Provide specific, actionable recommendations for each identified issue.
+        Batch requests cost half as much and don't count against the synchronous
+        rate limits, but results can take up to 24 hours.
         
-        IMPORTANT FORMATTING INSTRUCTIONS FOR detailed_analysis:
-        - Use clear section headers with ** bold formatting **
-        - Separate sections with double line breaks (\\n\\n)
-        - Write in well-structured paragraphs
-        - Include specific examples and actionable advice
-        - Use bullet points where appropriate
-        - Make it readable and professional
+        Args:
+            items: (contract_text, jurisdiction, contract_type) for each contract;
+                its position in the list is its custom_id in the results
+            
+        Returns:
+            The batch ID to pass to poll_batch()
         """
+        lines = []
+        for index, (contract_text, jurisdiction, contract_type) in enumerate(items):
+            contract_text = await asyncio.to_thread(self._fit_token_budget, contract_text)
+            lines.append(orjson.dumps({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._analysis_request(contract_text, jurisdiction, contract_type)
+            }))
+        
+        batch_file = await self.openai_client.files.create(
+            file=("contract_analyses.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await self.openai_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
     
-    def _parse_analysis_response(self, analysis_data: Dict[str, Any]) -> ContractAnalysisResponse:
-        """Parse AI response into structured ContractAnalysisResponse"""
+    async def poll_batch(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Check a batch submitted with submit_batch() and collect its analyses once it is done
         
-        # Parse risky clauses
-        risky_clauses = []
-        for clause_data in analysis_data.get('risky_clauses', []):
-            risky_clauses.append(RiskyClause(
-                clause_type=clause_data.get('clause_type', 'Unknown'),
-                description=clause_data.get('description', ''),
-                recommendation=clause_data.get('recommendation', ''),
-                risk_level=clause_data.get('risk_level', 'medium')
-            ))
+        Args:
+            batch_id: ID returned by submit_batch()
+            
+        Returns:
+            Dict with the batch "status"; once completed, "results" maps each
+            custom_id to its ContractAnalysisResponse or an error dict
+        """
+        batch = await self.openai_client.batches.retrieve(batch_id)
+        if batch.status != "completed":
+            return {"status": batch.status}
         
-        # Parse missing protections
-        missing_protections = []
-        for protection_data in analysis_data.get('missing_protections', []):
-            missing_protections.append(MissingProtection(
-                protection_type=protection_data.get('protection_type', 'Unknown'),
-                description=protection_data.get('description', ''),
-                importance=protection_data.get('importance', ''),
-                suggested_clause=protection_data.get('suggested_clause', '')
-            ))
+        results: Dict[str, Any] = {}
+        # Successful requests land in the output file, failed ones in the error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.openai_client.files.content(file_id)
+            for line in content.content.splitlines():
+                if not line.strip():
+                    continue
+                record = orjson.loads(line)
+                response = record.get("response") or {}
+                try:
+                    if response.get("status_code") != 200:
+                        raise Exception(record.get("error") or response.get("body"))
+                    completion = ChatCompletion.model_validate(response["body"])
+                    results[record["custom_id"]], _ = self._analysis_from_completion(completion)
+                except Exception as e:
+                    results[record["custom_id"]] = {"error": f"AI analysis failed: {str(e)}"}
         
-        # Format detailed analysis with HTML classes
-        detailed_analysis = self._format_detailed_analysis_html(analysis_data.get('detailed_analysis', 'Detailed analysis not available'))
+        return {"status": batch.status, "results": results}
+    
+    def _fit_token_budget(self, contract_text: str) -> str:
+        """Trim contract text to MAX_CONTRACT_TOKENS, keeping the first three quarters and the last quarter"""
+        # encode_ordinary: a contract that happens to contain "<|endoftext|>" is still plain text
+        tokens = self.tokenizer.encode_ordinary(contract_text)
+        if len(tokens) <= self.MAX_CONTRACT_TOKENS:
+            return contract_text
         
-        return ContractAnalysisResponse(
-            risk_score=min(10, max(1, analysis_data.get('risk_score', 5))),
-            summary=analysis_data.get('summary', 'Analysis completed'),
-            risky_clauses=risky_clauses,
-            missing_protections=missing_protections,
-            detailed_analysis=detailed_analysis,
-            document_id=""  # Will be set by the main handler
-        )
+        head = self.MAX_CONTRACT_TOKENS * 3 // 4
+        tail = self.MAX_CONTRACT_TOKENS - head
+        return f"{self.tokenizer.decode(tokens[:head])}\n...[TRUNCATED]...\n{self.tokenizer.decode(tokens[-tail:])}"
+    
+    def _build_analysis_prompt(
+        self, 
+        contract_text: str, 
+        jurisdiction: Optional[str] = None,
+        contract_type: Optional[str] = None
+    ) -> str:
+        """Build the analysis prompt: fixed instructions, then the contract, then its context"""
+        parts = [ANALYSIS_INSTRUCTIONS, f"CONTRACT TEXT:\n{contract_text}"]
+        # Per-request context goes last so it never splits the shared prefix
+        if jurisdiction:
+            parts.append(f"JURISDICTION: {jurisdiction}\nConsider the specific jurisdiction ({jurisdiction}) laws and requirements.")
+        if contract_type:
+            parts.append(f"CONTRACT TYPE: {contract_type}\nFocus on issues specific to {contract_type} contracts.")
+        return "\n\n".join(parts)
+    
+    def _parse_analysis_response(self, analysis_data: Dict[str, Any]) -> ContractAnalysisResponse:
+        """Parse AI response into structured ContractAnalysisResponse"""
+        # Clause and protection lists are validated in one pass, with the model
+        # defaults filling in any fields the AI left out
+        return ContractAnalysisResponse.model_validate({
+            "risk_score": min(10, max(1, analysis_data.get('risk_score', 5))),
+            "summary": analysis_data.get('summary', 'Analysis completed'),
+            "risky_clauses": analysis_data.get('risky_clauses', []),
+            "missing_protections": analysis_data.get('missing_protections', []),
+            # Format detailed analysis with HTML classes
+            "detailed_analysis": self._format_detailed_analysis_html(analysis_data.get('detailed_analysis', 'Detailed analysis not available')),
+            "document_id": ""  # Will be set by the main handler
+        })
     
     def _format_detailed_analysis_html(self, raw_text: str) -> str:
         """Format the detailed analysis text with appropriate HTML classes for styling"""
@@ -216,17 +418,9 @@ class AIAnalyzer:
             Number of Risky Clauses: {len(analysis.risky_clauses)}
             Number of Missing Protections: {len(analysis.missing_protections)}
             
-            Please provide recommendations in JSON format:
-            {{
-                "immediate_actions": "<most urgent actions to take>",
-                "negotiation_priorities": "<key points to focus on during negotiations>",
-                "legal_review_needed": "<whether professional legal review is recommended>",
-                "contract_approval": "<recommendation on whether to sign as-is, negotiate, or reject>"
-            }}
             """
             
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
+            response = await self.openai_client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
@@ -238,7 +432,7 @@ class AIAnalyzer:
                         "content": prompt
                     }
                 ],
-                response_format={"type": "json_object"},
+                response_format=RECOMMENDATIONS_RESPONSE_FORMAT,
                 max_tokens=1000,
                 temperature=0.2
             )
@@ -246,7 +440,7 @@ class AIAnalyzer:
             content = response.choices[0].message.content
             if not content:
                 return {"error": "AI response was empty"}
-            return json.loads(content)
+            return _load_json_response(response.choices[0])
             
         except Exception as e:
             return {
@@ -1,14 +1,113 @@
 import os
+import time
 import asyncio
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import logging
+from string import Template
+from typing import Dict, Any, Optional, Callable, Awaitable
+from openai import AsyncOpenAI
+from services.http_client import get_openai_http_client
+from utils.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+# Queries that never get a legal disclaimer appended (exact match)
+SIMPLE_GREETINGS = frozenset({"hi", "hello", "hey", "hi!", "hello!", "hey!"})
+
+# Contract-related keywords, matched by substring in one Aho-Corasick pass
+CONTRACT_RELATED_KEYWORDS = frozenset({
+    # Direct contract terms
+    "contract", "agreement", "nda", "clause", "terms", "conditions", "legal",
+    "liability", "indemnity", "termination", "breach", "compliance", "negotiate",
+    
+    # Legal concepts
+    "law", "legal", "attorney", "lawyer", "court", "litigation", "dispute",
+    "jurisdiction", "governing", "statute", "regulation", "rights", "obligations",
+    
+    # Business/contract actions
+    "sign", "execute", "amend", "modify", "review", "analyze", "risk", "audit",
+    "due diligence", "merger", "acquisition", "partnership", "vendor", "supplier",
+    
+    # Document types
+    "employment", "lease", "rental", "purchase", "sale", "service", "licensing",
+    "confidentiality", "non-disclosure", "intellectual property", "copyright",
+    "trademark", "patent", "warranty", "guarantee", "insurance", "policy",
+    
+    # Financial/commercial terms
+    "payment", "invoice", "penalty", "damages", "compensation", "fee", "price",
+    "cost", "budget", "financial", "commercial", "business", "corporate",
+    
+    # Risk and analysis terms
+    "risky", "dangerous", "problematic", "unfair", "unreasonable", "standard",
+    "market", "industry", "benchmark", "best practice", "recommendation",
+    
+    # Service Level Agreements and related terms
+    "sla", "service level agreement", "service level", "uptime", "availability",
+    "response time", "escalation", "service credit", "maintenance window",
+    "performance metric", "service delivery", "downtime", "outage",
+    
+    # Contract type abbreviations
+    "msa", "master service agreement", "sow", "statement of work", "loi", "letter of intent",
+    "mou", "memorandum of understanding", "nca", "non-compete agreement", 
+    "cda", "confidentiality disclosure agreement", "pii", "personally identifiable information",
+    "gdpr", "general data protection regulation", "ccpa", "california consumer privacy act",
+    "hipaa", "health insurance portability", "sox", "sarbanes oxley", "pci", "payment card industry",
+    "eula", "end user license agreement", "tos", "terms of service", "pp", "privacy policy",
+    "dpa", "data processing agreement", "baa", "business associate agreement",
+    "rfi", "request for information", "rfp", "request for proposal", "rfq", "request for quote",
+    "po", "purchase order", "dnr", "do not resuscitate", "aup", "acceptable use policy"
+})
+CONTRACT_KEYWORD_MATCHER = KeywordMatcher({"contract": CONTRACT_RELATED_KEYWORDS})
+
+# Fixed system prompts; only the post-analysis one has per-request placeholders
+GENERAL_CHAT_SYSTEM_PROMPT = """You're Lexi, a friendly legal assistant. Be helpful and conversational - like texting a knowledgeable friend. Keep responses short and natural. Don't be formal or wordy.
+
+For capability questions ("help", "what can you do"), explain your abilities naturally and conversationally."""
+
+DOCUMENT_CHAT_SYSTEM_PROMPT = """You are a friendly, experienced contract attorney who specializes in explaining contract terms in plain English. You're reviewing a specific contract with a client and helping them understand what they're looking at.
+
+Your approach:
+- Speak directly to the user about THEIR contract
+- Point out specific clauses and explain what they mean in everyday language
+- Highlight potential concerns in a caring, protective way
+- Suggest practical next steps or questions they should ask
+- Use phrases like "In your contract..." "This clause means..." "I notice that..."
+- Be encouraging while being honest about risks
+- Make the user feel confident about understanding their contract
+
+Remember: You're helping them understand THEIR specific contract, not giving general advice."""
+
+POST_ANALYSIS_SYSTEM_PROMPT_TMPL = Template("""You are a caring, experienced contract attorney who just completed analyzing a client's contract. You're now discussing the results with them in a supportive, educational way.
+
+Your approach:
+- Reference their specific analysis results directly
+- Help them prioritize what's most important to address
+- Explain the implications of the findings in practical terms
+- Suggest concrete next steps they can take
+- Be reassuring when appropriate, but honest about genuine concerns
+- Help them understand what they should negotiate or ask about
+- Make them feel empowered to make informed decisions
+
+The analysis shows:
+- Overall risk score: $risk_score/10
+- $risky_clauses_count potential risk areas identified
+- $missing_protections_count missing protections noted
+
+Remember: They're looking to you for guidance on what to do with this information.""")
 
 class ContractChatService:
     """Friendly contract chat assistant using GPT-4o mini for conversational interactions"""
     
+    # Streamed text is handed to on_partial at most this often; consumers
+    # (Telegram edits) can't show it any faster
+    PARTIAL_UPDATE_INTERVAL_SECONDS = 0.5
+    
     def __init__(self):
-        self.openai_client = OpenAI(
-            api_key=os.environ.get("OPENAI_API_KEY")
+        # Requests (and streamed replies) wait on the event loop instead of holding a worker thread each.
+        # The SDK retries 429/5xx/connection errors with jittered backoff, honouring Retry-After
+        self.openai_client = AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            max_retries=int(os.environ.get("OPENAI_MAX_RETRIES", "5")),
+            http_client=get_openai_http_client()
         )
         # Use GPT-4o mini for friendly, conversational contract assistance
         self.chat_model = "gpt-4o-mini"
@@ -17,52 +116,8 @@ class ContractChatService:
         """Check if a query is related to contracts, legal matters, or document analysis"""
         query_lower = query.lower().strip()
         
-        # Contract-related keywords
-        contract_keywords = [
-            # Direct contract terms
-            "contract", "agreement", "nda", "clause", "terms", "conditions", "legal",
-            "liability", "indemnity", "termination", "breach", "compliance", "negotiate",
-            
-            # Legal concepts
-            "law", "legal", "attorney", "lawyer", "court", "litigation", "dispute",
-            "jurisdiction", "governing", "statute", "regulation", "rights", "obligations",
-            
-            # Business/contract actions
-            "sign", "execute", "amend", "modify", "review", "analyze", "risk", "audit",
-            "due diligence", "merger", "acquisition", "partnership", "vendor", "supplier",
-            
-            # Document types
-            "employment", "lease", "rental", "purchase", "sale", "service", "licensing",
-            "confidentiality", "non-disclosure", "intellectual property", "copyright",
-            "trademark", "patent", "warranty", "guarantee", "insurance", "policy",
-            
-            # Financial/commercial terms
-            "payment", "invoice", "penalty", "damages", "compensation", "fee", "price",
-            "cost", "budget", "financial", "commercial", "business", "corporate",
-            
-            # Risk and analysis terms
-            "risky", "dangerous", "problematic", "unfair", "unreasonable", "standard",
-            "market", "industry", "benchmark", "best practice", "recommendation",
-            
-            # Service Level Agreements and related terms
-            "sla", "service level agreement", "service level", "uptime", "availability",
-            "response time", "escalation", "service credit", "maintenance window",
-            "performance metric", "service delivery", "downtime", "outage",
-            
-            # Contract type abbreviations
-            "msa", "master service agreement", "sow", "statement of work", "loi", "letter of intent",
-            "mou", "memorandum of understanding", "nca", "non-compete agreement", 
-            "cda", "confidentiality disclosure agreement", "pii", "personally identifiable information",
-            "gdpr", "general data protection regulation", "ccpa", "california consumer privacy act",
-            "hipaa", "health insurance portability", "sox", "sarbanes oxley", "pci", "payment card industry",
-            "eula", "end user license agreement", "tos", "terms of service", "pp", "privacy policy",
-            "dpa", "data processing agreement", "baa", "business associate agreement",
-            "rfi", "request for information", "rfp", "request for proposal", "rfq", "request for quote",
-            "po", "purchase order", "dnr", "do not resuscitate", "aup", "acceptable use policy"
-        ]
-        
         # Check if query contains contract keywords
-        if any(keyword in query_lower for keyword in contract_keywords):
+        if CONTRACT_KEYWORD_MATCHER.matches(query_lower):
             return True
         
         return False
@@ -86,7 +141,8 @@ What would you like to know?"""
         query: str, 
         jurisdiction: Optional[str] = None,
         contract_type: Optional[str] = None,
-        force_natural_response: bool = True
+        force_natural_response: bool = True,
+        on_partial: Optional[Callable[[str], Awaitable[Any]]] = None
     ) -> Dict[str, Any]:
         """
         Handle general contract questions before upload or general legal guidance
@@ -95,6 +151,7 @@ What would you like to know?"""
             query: User's question about contracts, legal terms, or general guidance
             jurisdiction: Optional jurisdiction context
             contract_type: Optional contract type context
+            on_partial: Optional callback streamed the answer text generated so far
             
         Returns:
             Conversational response with legal guidance
@@ -121,24 +178,18 @@ What would you like to know?"""
                 if contract_type:
                     context_info += f" Since you're working with a {contract_type} contract, I'll focus on relevant aspects."
             
-            # Simple, natural system prompt
-            system_prompt = f"""You're Lexi, a friendly legal assistant. Be helpful and conversational - like texting a knowledgeable friend. Keep responses short and natural. Don't be formal or wordy.
-
-For capability questions ("help", "what can you do"), explain your abilities naturally and conversationally."""
-
             # Simple user prompt
             user_prompt = f"""{query}
 
 {context_info}"""
 
             # Call OpenAI API with conversational settings
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
+            request = dict(
                 model=self.chat_model,
                 messages=[
                     {
                         "role": "system",
-                        "content": system_prompt
+                        "content": GENERAL_CHAT_SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
@@ -151,7 +202,7 @@ For capability questions ("help", "what can you do"), explain your abilities nat
                 frequency_penalty=0.0
             )
             
-            content = response.choices[0].message.content
+            content = await self._complete(request, on_partial)
             if not content:
                 content = "I apologize, but I'm having trouble processing your question right now. Could you try rephrasing it?"
             
@@ -160,8 +211,7 @@ For capability questions ("help", "what can you do"), explain your abilities nat
             content_lower = content.lower()
             
             # Simple greetings and casual responses should never have disclaimers
-            simple_greetings = ["hi", "hello", "hey", "hi!", "hello!", "hey!"]
-            is_simple_greeting = any(query_lower == greeting for greeting in simple_greetings)
+            is_simple_greeting = query_lower in SIMPLE_GREETINGS
             
             # Only add disclaimer if giving actual legal advice or analysis
             gives_legal_advice = any(phrase in content_lower for phrase in [
@@ -189,12 +239,60 @@ For capability questions ("help", "what can you do"), explain your abilities nat
                 "type": "general_chat"
             }
     
+    async def _complete(
+        self,
+        request: Dict[str, Any],
+        on_partial: Optional[Callable[[str], Awaitable[Any]]] = None
+    ) -> Optional[str]:
+        """Run a chat completion, streaming it when the caller wants partial text"""
+        if on_partial is not None:
+            return await self._stream_completion(request, on_partial)
+        response = await self.openai_client.chat.completions.create(**request)
+        return response.choices[0].message.content
+    
+    async def _stream_completion(
+        self,
+        request: Dict[str, Any],
+        on_partial: Callable[[str], Awaitable[Any]]
+    ) -> str:
+        """Run a chat completion as a stream, periodically passing the text so far to on_partial"""
+        stream = await self.openai_client.chat.completions.create(stream=True, **request)
+        parts = []
+        update: Optional[asyncio.Task] = None
+        last_update = 0.0
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    now = time.monotonic()
+                    # Updates run beside the stream, and are skipped while one is still being
+                    # delivered, so a slow send never holds up reading tokens
+                    if now - last_update >= self.PARTIAL_UPDATE_INTERVAL_SECONDS and (update is None or update.done()):
+                        last_update = now
+                        update = asyncio.create_task(self._send_partial(on_partial, "".join(parts)))
+        finally:
+            # Let the last partial update land before the caller shows the final answer
+            # (or an apology, if the stream failed), so it edits that message instead of
+            # sending a second one; _send_partial never raises
+            if update is not None:
+                await update
+        return "".join(parts)
+    
+    @staticmethod
+    async def _send_partial(on_partial: Callable[[str], Awaitable[Any]], text: str):
+        """Pass partial text on; a failed update never aborts the answer itself"""
+        try:
+            await on_partial(text)
+        except Exception as e:
+            logger.warning("Partial answer update failed: %s", e)
+    
     async def document_specific_chat(
         self, 
         query: str, 
         contract_context: str,
         jurisdiction: Optional[str] = None,
-        contract_type: Optional[str] = None
+        contract_type: Optional[str] = None,
+        on_partial: Optional[Callable[[str], Awaitable[Any]]] = None
     ) -> Dict[str, Any]:
         """
         Handle questions about a specific uploaded contract with friendly conversation
@@ -204,6 +302,7 @@ For capability questions ("help", "what can you do"), explain your abilities nat
             contract_context: Relevant sections from their contract
             jurisdiction: Optional jurisdiction context
             contract_type: Optional contract type context
+            on_partial: Optional callback streamed the answer text generated so far
             
         Returns:
             Conversational response about their specific contract
@@ -216,34 +315,24 @@ For capability questions ("help", "what can you do"), explain your abilities nat
             if contract_type:
                 context_info += f" and it's a {contract_type} contract, "
             
-            system_prompt = f"""You are a friendly, experienced contract attorney who specializes in explaining contract terms in plain English. You're reviewing a specific contract with a client and helping them understand what they're looking at.
-
-Your approach:
-- Speak directly to the user about THEIR contract
-- Point out specific clauses and explain what they mean in everyday language
-- Highlight potential concerns in a caring, protective way
-- Suggest practical next steps or questions they should ask
-- Use phrases like "In your contract..." "This clause means..." "I notice that..."
-- Be encouraging while being honest about risks
-- Make the user feel confident about understanding their contract
-
-Remember: You're helping them understand THEIR specific contract, not giving general advice."""
-
             user_prompt = f"""I'm looking at my contract and have a specific question: {query}
 
-{context_info}here are the relevant sections from my contract:
-
-{contract_context}
+{context_info}the relevant sections from my contract are above.
 
 Please help me understand what this means for my specific situation and what I should be aware of."""
 
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
+            request = dict(
                 model=self.chat_model,
                 messages=[
                     {
                         "role": "system",
-                        "content": system_prompt
+                        "content": DOCUMENT_CHAT_SYSTEM_PROMPT
+                    },
+                    # Contract sections come before the question so follow-up
+                    # questions on the same contract share a cacheable prefix
+                    {
+                        "role": "user",
+                        "content": f"Here are the relevant sections from my contract:\n\n{contract_context}"
                     },
                     {
                         "role": "user",
@@ -256,7 +345,7 @@ Please help me understand what this means for my specific situation and what I s
                 frequency_penalty=0.1
             )
             
-            content = response.choices[0].message.content
+            content = await self._complete(request, on_partial)
             if not content:
                 content = "I'm having trouble analyzing that specific part of your contract right now. Could you ask about a different section or rephrase your question?"
             
@@ -278,7 +367,8 @@ Please help me understand what this means for my specific situation and what I s
         query: str, 
         analysis_results: Dict[str, Any],
         jurisdiction: Optional[str] = None,
-        contract_type: Optional[str] = None
+        contract_type: Optional[str] = None,
+        on_partial: Optional[Callable[[str], Awaitable[Any]]] = None
     ) -> Dict[str, Any]:
         """
         Handle questions about completed analysis results with friendly guidance
@@ -288,6 +378,7 @@ Please help me understand what this means for my specific situation and what I s
             analysis_results: The completed contract analysis
             jurisdiction: Optional jurisdiction context
             contract_type: Optional contract type context
+            on_partial: Optional callback streamed the answer text generated so far
             
         Returns:
             Conversational response about their analysis results
@@ -304,23 +395,11 @@ Please help me understand what this means for my specific situation and what I s
             if contract_type:
                 context_info += f" for this {contract_type} contract"
             
-            system_prompt = f"""You are a caring, experienced contract attorney who just completed analyzing a client's contract. You're now discussing the results with them in a supportive, educational way.
-
-Your approach:
-- Reference their specific analysis results directly
-- Help them prioritize what's most important to address
-- Explain the implications of the findings in practical terms
-- Suggest concrete next steps they can take
-- Be reassuring when appropriate, but honest about genuine concerns
-- Help them understand what they should negotiate or ask about
-- Make them feel empowered to make informed decisions
-
-The analysis shows:
-- Overall risk score: {risk_score}/10
-- {risky_clauses_count} potential risk areas identified
-- {missing_protections_count} missing protections noted
-
-Remember: They're looking to you for guidance on what to do with this information."""
+            system_prompt = POST_ANALYSIS_SYSTEM_PROMPT_TMPL.substitute(
+                risk_score=risk_score,
+                risky_clauses_count=risky_clauses_count,
+                missing_protections_count=missing_protections_count
+            )
 
             user_prompt = f"""Based on my contract analysis results, I have a question: {query}
 
@@ -335,8 +414,7 @@ Analysis Summary: {analysis_results.get('summary', 'Analysis completed')}
 
 Please help me understand what this means and what I should do next."""
 
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
+            request = dict(
                 model=self.chat_model,
                 messages=[
                     {
@@ -354,7 +432,7 @@ Please help me understand what this means and what I should do next."""
                 frequency_penalty=0.1
             )
             
-            content = response.choices[0].message.content
+            content = await self._complete(request, on_partial)
             if not content:
                 content = "I'm having some trouble right now, but I'd love to help you understand your analysis results. Could you ask about a specific finding or what you should prioritize first?"
             
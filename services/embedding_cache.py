@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+import numpy as np
+import redis.asyncio as aioredis
+from cachetools import LRUCache
+from services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Two-level embedding cache: in-process LRU in front of Redis shared by all workers"""
+
+    # Embeddings for a given model never change, so entries can live for a long time
+    REDIS_TTL_SECONDS = 30 * 24 * 3600
+    KEY_PREFIX = "emb"
+
+    def __init__(self, model: str, local_max_entries: int = 1000):
+        """
+        Args:
+            model: Embedding model name (part of every key, so switching models never mixes vectors)
+            local_max_entries: Size of the in-process LRU cache
+        """
+        self.model = model
+        self._local: LRUCache = LRUCache(maxsize=local_max_entries)
+        # Without Redis, embeddings are only cached in-process
+        self.redis: Optional[aioredis.Redis] = get_redis()
+        # Batches currently being embedded, so concurrent callers share one API call per text
+        self._inflight: Dict[str, "asyncio.Task[Dict[str, np.ndarray]]"] = {}
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{self.KEY_PREFIX}:{self.model}:{digest}"
+
+    async def get_or_embed(
+        self,
+        texts: List[str],
+        embed_fn: Callable[[List[str]], Awaitable[np.ndarray]]
+    ) -> np.ndarray:
+        """
+        Return embeddings for texts, calling embed_fn only for texts not cached anywhere
+
+        Args:
+            texts: Texts to embed
+            embed_fn: Async function embedding a list of texts in one API call
+
+        Returns:
+            float32 matrix with one row per input text, in input order
+        """
+        keys = [self._key(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        for key in keys:
+            vector = self._local.get(key)
+            if vector is not None:
+                found[key] = vector
+
+        missing_keys = list(dict.fromkeys(key for key in keys if key not in found))
+        if missing_keys and self.redis is not None:
+            try:
+                for key, raw in zip(missing_keys, await self.redis.mget(missing_keys)):
+                    if raw is not None:
+                        vector = np.frombuffer(raw, dtype=np.float32)
+                        found[key] = vector
+                        self._local[key] = vector
+            except Exception as e:
+                # Redis is an optimization; never fail embedding because of it
+                logger.warning("Embedding cache read failed: %s", e)
+
+        # Texts another caller is already embedding (e.g. a prefetch) are awaited, not re-requested
+        pending = {key: self._inflight[key] for key in keys if key not in found and key in self._inflight}
+
+        # Embed each remaining text once, even if it appears several times
+        to_embed: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                to_embed.setdefault(key, text)
+
+        if to_embed:
+            batch = asyncio.ensure_future(self._embed_and_store(to_embed, embed_fn))
+            for key in to_embed:
+                self._inflight[key] = batch
+            try:
+                # Shielded so a cancelled caller doesn't fail the callers sharing the batch
+                found.update(await asyncio.shield(batch))
+            finally:
+                for key in to_embed:
+                    if self._inflight.get(key) is batch:
+                        del self._inflight[key]
+
+        for key, batch in pending.items():
+            found[key] = (await asyncio.shield(batch))[key]
+
+        return np.stack([found[key] for key in keys])
+
+    async def _embed_and_store(
+        self,
+        to_embed: Dict[str, str],
+        embed_fn: Callable[[List[str]], Awaitable[np.ndarray]]
+    ) -> Dict[str, np.ndarray]:
+        """Embed texts keyed by cache key and write the vectors to both cache levels"""
+        embeddings = (await embed_fn(list(to_embed.values()))).astype(np.float32)
+        vectors = dict(zip(to_embed, embeddings))
+        self._local.update(vectors)
+
+        if self.redis is not None:
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for key, vector in vectors.items():
+                        pipe.setex(key, self.REDIS_TTL_SECONDS, vector.tobytes())
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning("Embedding cache write failed: %s", e)
+
+        return vectors
@@ -1,22 +1,80 @@
 import os
-import tempfile
-from typing import Optional
-import PyPDF2
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, List, Optional, Tuple, Union
+import pypdfium2 as pdfium
 from docx import Document
 from pathlib import Path
 
+# Page-count thresholds for choosing a PDF extraction strategy
+PDF_SEQUENTIAL_MAX_PAGES = 200
+PDF_LARGE_DOC_PAGES = 1000
+PDF_CHUNK_PAGES = 200
+PDF_LARGE_CHUNK_PAGES = 500
+
+# PDFium is not thread-safe and pypdfium2 does not lock around it, so every
+# in-process call goes through this lock (worker processes have their own PDFium)
+_PDFIUM_LOCK = threading.Lock()
+
+def _read_pdf_pages(pdf: pdfium.PdfDocument, start: int, stop: int) -> List[str]:
+    """Return the text of pages [start, stop) in page order (empty pages included)"""
+    pages = []
+    for index in range(start, stop):
+        page = pdf[index]
+        textpage = page.get_textpage()
+        pages.append(textpage.get_text_range().replace('\r\n', '\n'))
+        textpage.close()
+        page.close()
+    return pages
+
+def _extract_pdf_pages(source: Union[str, bytes], start: int, stop: int) -> List[str]:
+    """Open a PDF (path or content) and read a page range; module-level so it can run in a worker process"""
+    pdf = pdfium.PdfDocument(source)
+    try:
+        return _read_pdf_pages(pdf, start, stop)
+    finally:
+        pdf.close()
+
 class FileProcessor:
     """Service for processing and extracting text from uploaded files"""
     
     def __init__(self):
         self.supported_extensions = {'.pdf', '.docx'}
+        # Cap concurrent DOCX parses and process-pool dispatches so several large uploads don't thrash the CPU
+        self._extract_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+        # PDFium is not thread-safe: in-process PDF parsing runs one at a time
+        self._pdf_semaphore = asyncio.Semaphore(1)
+        # Created on first large PDF so small uploads never pay the spawn cost
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        # Extractions run in threads, so two large PDFs can ask for the pool at once
+        self._process_pool_lock = threading.Lock()
+    
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                # Spawned rather than forked: forking the threaded server process can
+                # copy held locks into the children and deadlock them
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._process_pool
+    
+    def close(self):
+        """Shut down the PDF worker processes"""
+        with self._process_pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(cancel_futures=True)
+                self._process_pool = None
     
-    async def extract_text(self, file_path: str, filename: str) -> str:
+    async def extract_text(self, source: Union[str, BinaryIO], filename: str) -> str:
         """
         Extract text content from uploaded file
         
         Args:
-            file_path: Path to the temporary file
+            source: Path to the file, or a seekable binary file object (e.g. the upload's spooled file)
             filename: Original filename to determine file type
             
         Returns:
@@ -32,51 +90,80 @@ class FileProcessor:
             raise ValueError(f"Unsupported file type: {file_extension}")
         
         try:
+            # Parsing is CPU-bound; keep it off the event loop
             if file_extension == '.pdf':
-                return await self._extract_pdf_text(file_path)
+                return await self._extract_pdf_text(source)
             elif file_extension == '.docx':
-                return await self._extract_docx_text(file_path)
+                async with self._extract_semaphore:
+                    return await asyncio.to_thread(self._extract_docx_text, source)
             else:
                 raise ValueError(f"Unsupported file type: {file_extension}")
                 
         except Exception as e:
             raise Exception(f"Failed to extract text from {filename}: {str(e)}")
     
-    async def _extract_pdf_text(self, file_path: str) -> str:
-        """Extract text from PDF file"""
-        text_content = []
-        
+    async def _extract_pdf_text(self, source: Union[str, BinaryIO]) -> str:
+        """Extract text from PDF file using the native PDFium engine"""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Check if PDF is encrypted
-                if pdf_reader.is_encrypted:
-                    raise Exception("PDF is password-protected. Please provide an unprotected version.")
-                
-                # Extract text from all pages
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    
-                    if page_text.strip():
-                        text_content.append(page_text)
-                
-                if not text_content:
-                    raise Exception("No text could be extracted from the PDF. The file may be image-based or corrupted.")
-                
-                return '\n\n'.join(text_content)
+            # PDFium can only be used by one thread of this process at a time
+            async with self._pdf_semaphore:
+                page_count, page_texts = await asyncio.to_thread(self._read_pdf_in_process, source)
+            
+            if page_texts is None:
+                async with self._extract_semaphore:
+                    page_texts = await asyncio.to_thread(self._read_pdf_in_pool, source, page_count)
+            
+            text_content = [page_text for page_text in page_texts if page_text.strip()]
+            
+            if not text_content:
+                raise Exception("No text could be extracted from the PDF. The file may be image-based or corrupted.")
+            
+            return '\n\n'.join(text_content)
                 
         except Exception as pdf_error:
-            if "PdfReadError" in str(type(pdf_error)) or "PDF" in str(pdf_error):
+            if isinstance(pdf_error, pdfium.PdfiumError) or "PDF" in str(pdf_error):
                 raise Exception(f"Invalid PDF file: {str(pdf_error)}")
             else:
                 raise Exception(f"Error reading PDF: {str(pdf_error)}")
     
-    async def _extract_docx_text(self, file_path: str) -> str:
+    def _read_pdf_in_process(self, source: Union[str, BinaryIO]) -> Tuple[int, Optional[List[str]]]:
+        """Return the page count and page texts, or no texts if the document should go to the process pool"""
+        with _PDFIUM_LOCK:
+            try:
+                pdf = pdfium.PdfDocument(source)
+            except pdfium.PdfiumError as open_error:
+                # Encrypted documents fail to open without a password
+                if "password" in str(open_error).lower():
+                    raise Exception("PDF is password-protected. Please provide an unprotected version.")
+                raise
+            
+            try:
+                page_count = len(pdf)
+                # Small documents (or a single core): worker startup would cost more than it saves
+                if page_count > PDF_SEQUENTIAL_MAX_PAGES and (os.cpu_count() or 1) > 1:
+                    return page_count, None
+                return page_count, _read_pdf_pages(pdf, 0, page_count)
+            finally:
+                pdf.close()
+    
+    def _read_pdf_in_pool(self, source: Union[str, BinaryIO], page_count: int) -> List[str]:
+        """Parse page ranges of a large PDF across the worker processes"""
+        chunk = PDF_CHUNK_PAGES if page_count <= PDF_LARGE_DOC_PAGES else PDF_LARGE_CHUNK_PAGES
+        pool = self._get_process_pool()
+        # Workers reopen the document, so file objects are sent as bytes
+        if not isinstance(source, str):
+            source.seek(0)
+            source = source.read()
+        futures = [
+            pool.submit(_extract_pdf_pages, source, start, min(start + chunk, page_count))
+            for start in range(0, page_count, chunk)
+        ]
+        return [text for future in futures for text in future.result()]
+    
+    def _extract_docx_text(self, source: Union[str, BinaryIO]) -> str:
         """Extract text from DOCX file"""
         try:
-            doc = Document(file_path)
+            doc = Document(source)
             text_content = []
             
             # Extract text from paragraphs
@@ -1,17 +1,45 @@
 import os
 import json
+import time
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
 from google.cloud.firestore import Client
+from cachetools import TLRUCache
 
 class FirebaseClient:
     """Service for Firebase/Firestore integration"""
     
+    # Flush queued writes early once this many are waiting
+    BULK_MAX_PENDING = 500
+    
+    # Verified ID tokens are reused for at most this long, and never closer than
+    # TOKEN_EXPIRY_SKEW seconds to the token's own expiry
+    TOKEN_CACHE_TTL = 300
+    TOKEN_EXPIRY_SKEW = 30
+    
     def __init__(self):
         self.db: Optional[Client] = None
         self._initialize_firebase()
+        
+        # High-volume writes (chat history, analyses) are queued on a BulkWriter and
+        # sent in batches; BulkWriter is not thread-safe, so one thread owns it
+        self.bulk_writer = self.db.bulk_writer() if self.db else None
+        self._bulk_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="firestore-bulk")
+        self._pending_writes = 0
+        
+        # The Admin SDK is blocking; give it its own threads so it never starves the
+        # default executor used for file I/O and AI calls
+        self._executor = ThreadPoolExecutor(max_workers=40, thread_name_prefix="firebase")
+        
+        # sha256(token) -> (user profile, token expiry, cache expiry)
+        self._token_cache = TLRUCache(maxsize=10_000, ttu=lambda _key, value, _now: value[2], timer=time.time)
+        self._token_cache_lock = asyncio.Lock()
     
     def _initialize_firebase(self):
         """Initialize Firebase connection with production credentials"""
@@ -55,6 +83,77 @@ class FirebaseClient:
             print("System will continue without Firebase data persistence")
             self.db = None
     
+    async def _run(self, fn, *args, **kwargs):
+        """Run a blocking Firebase SDK call on the Firebase thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+    
+    @staticmethod
+    def _collect(query) -> List[Dict[str, Any]]:
+        """Stream a query and return its documents as dicts with their 'id'"""
+        results = []
+        for doc in query.stream():
+            data = doc.to_dict()
+            data['id'] = doc.id
+            results.append(data)
+        return results
+    
+    def _bulk_create(self, doc_ref, data: Dict[str, Any]):
+        """Add a create operation to the BulkWriter (runs on the bulk writer thread)"""
+        try:
+            self.bulk_writer.create(doc_ref, data)
+        except Exception as e:
+            print(f"Failed to queue Firestore write: {str(e)}")
+    
+    def _bulk_flush(self):
+        """Send all queued operations and wait for them (runs on the bulk writer thread)"""
+        try:
+            self.bulk_writer.flush()
+        except Exception as e:
+            print(f"Failed to flush Firestore writes: {str(e)}")
+    
+    def _queue_write(self, collection: str, data: Dict[str, Any]) -> str:
+        """
+        Queue a new document for a batched write and return its ID immediately
+        
+        Args:
+            collection: Firestore collection name
+            data: Document data
+            
+        Returns:
+            str: ID of the document that will be created
+        """
+        doc_ref = self.db.collection(collection).document()
+        self._bulk_executor.submit(self._bulk_create, doc_ref, data)
+        self._pending_writes += 1
+        if self._pending_writes >= self.BULK_MAX_PENDING:
+            self._pending_writes = 0
+            self._bulk_executor.submit(self._bulk_flush)
+        return doc_ref.id
+    
+    async def flush_writes(self):
+        """Send any queued writes without blocking the event loop"""
+        if not self.bulk_writer or not self._pending_writes:
+            return
+        
+        self._pending_writes = 0
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._bulk_executor, self._bulk_flush)
+    
+    async def run_flush_loop(self, interval: float = 0.5):
+        """Periodically flush queued writes; runs until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush_writes()
+    
+    async def close(self):
+        """Flush outstanding writes and stop the bulk writer thread"""
+        if self.bulk_writer:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._bulk_executor, self.bulk_writer.close)
+        self._bulk_executor.shutdown(wait=True)
+        self._executor.shutdown(wait=False)
+    
     async def store_analysis(
         self, 
         analysis_data: Dict[str, Any], 
@@ -87,11 +186,10 @@ class FirebaseClient:
                 'status': 'completed'
             }
             
-            # Store in Firestore
-            doc_ref = self.db.collection('contract_analyses').add(document_data)
-            document_id = doc_ref[1].id
+            # Queue for a batched Firestore write
+            document_id = self._queue_write('contract_analyses', document_data)
             
-            print(f"Analysis stored in Firestore with ID: {document_id}")
+            print(f"Analysis queued for Firestore with ID: {document_id}")
             return document_id
             
         except Exception as e:
@@ -114,7 +212,7 @@ class FirebaseClient:
         
         try:
             doc_ref = self.db.collection('contract_analyses').document(document_id)
-            doc = doc_ref.get()
+            doc = await self._run(doc_ref.get)
             
             if doc.exists:
                 return doc.to_dict()
@@ -146,15 +244,7 @@ class FirebaseClient:
                 .limit(limit)
             )
             
-            docs = query.stream()
-            analyses = []
-            
-            for doc in docs:
-                analysis_data = doc.to_dict()
-                analysis_data['id'] = doc.id
-                analyses.append(analysis_data)
-            
-            return analyses
+            return await self._run(self._collect, query)
             
         except Exception as e:
             print(f"Failed to retrieve user analyses: {str(e)}")
@@ -176,7 +266,7 @@ class FirebaseClient:
         
         try:
             doc_ref = self.db.collection('contract_analyses').document(document_id)
-            doc_ref.update({
+            await self._run(doc_ref.update, {
                 'status': status,
                 'updated_at': datetime.now(timezone.utc)
             })
@@ -200,7 +290,7 @@ class FirebaseClient:
             return False
         
         try:
-            self.db.collection('contract_analyses').document(document_id).delete()
+            await self._run(self.db.collection('contract_analyses').document(document_id).delete)
             return True
             
         except Exception as e:
@@ -214,7 +304,8 @@ class FirebaseClient:
         
         try:
             # Create user in Firebase Auth
-            user_record = auth.create_user(
+            user_record = await self._run(
+                auth.create_user,
                 email=email,
                 password=password,
                 email_verified=False
@@ -230,7 +321,7 @@ class FirebaseClient:
                 'total_chat_messages': 0
             }
             
-            self.db.collection('users').document(user_record.uid).set(user_data)
+            await self._run(self.db.collection('users').document(user_record.uid).set, user_data)
             
             return {
                 "success": True,
@@ -243,24 +334,50 @@ class FirebaseClient:
     
     async def verify_user(self, id_token: str) -> Optional[Dict[str, Any]]:
         """Verify Firebase ID token and return user info"""
+        user_info, _ = await self.verify_user_with_expiry(id_token)
+        return user_info
+    
+    async def verify_user_with_expiry(self, id_token: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        """
+        Verify Firebase ID token and return user info along with the token expiry
+        
+        Args:
+            id_token: Firebase ID token from the Authorization header
+            
+        Returns:
+            Tuple of (user profile or None, token expiry as a UNIX timestamp; 0 if invalid)
+        """
         if not self.db:
-            return None
+            return None, 0
+        
+        # Reuse a recent verification of the same token
+        token_key = hashlib.sha256(id_token.encode()).digest()
+        async with self._token_cache_lock:
+            cached = self._token_cache.get(token_key)
+        if cached:
+            return cached[0], cached[1]
         
         try:
             # Verify the token
-            decoded_token = auth.verify_id_token(id_token)
+            decoded_token = await self._run(auth.verify_id_token, id_token)
             uid = decoded_token['uid']
             
             # Get user profile from Firestore
-            user_doc = self.db.collection('users').document(uid).get()
+            user_doc = await self._run(self.db.collection('users').document(uid).get)
             
             if user_doc.exists:
-                return user_doc.to_dict()
-            return None
+                user_info = user_doc.to_dict()
+                token_expiry = float(decoded_token.get('exp', 0))
+                cache_until = min(time.time() + self.TOKEN_CACHE_TTL, token_expiry - self.TOKEN_EXPIRY_SKEW)
+                if cache_until > time.time():
+                    async with self._token_cache_lock:
+                        self._token_cache[token_key] = (user_info, token_expiry, cache_until)
+                return user_info, token_expiry
+            return None, 0
             
         except Exception as e:
             print(f"Failed to verify user: {str(e)}")
-            return None
+            return None, 0
     
     async def store_contract_submission(
         self,
@@ -300,7 +417,7 @@ class FirebaseClient:
                 contract_data['hasUpload'] = False
             
             # Store in 'contracts' collection with auto-generated ID
-            doc_ref = self.db.collection('contracts').add(contract_data)
+            doc_ref = await self._run(self.db.collection('contracts').add, contract_data)
             print(f"Contract submission stored with ID: {doc_ref[1].id}")
             return doc_ref[1].id
             
@@ -314,7 +431,9 @@ class FirebaseClient:
         email: str,
         jurisdiction: str,
         contract_type: str,
-        vector_id: str
+        vector_id: str,
+        content_hash: Optional[str] = None,
+        doc_id: Optional[str] = None
     ) -> str:
         """Store document metadata in Firestore (legacy method)"""
         if not self.db:
@@ -331,13 +450,48 @@ class FirebaseClient:
                 'status': 'processed'
             }
             
-            doc_ref = self.db.collection('documents').add(doc_data)
+            # Lets repeat uploads of the same file be detected
+            if content_hash:
+                doc_data['content_hash'] = content_hash
+            if doc_id:
+                doc_data['doc_id'] = doc_id
+            
+            doc_ref = await self._run(self.db.collection('documents').add, doc_data)
             return doc_ref[1].id
             
         except Exception as e:
             print(f"Failed to store document metadata: {str(e)}")
             return f"error_doc_{datetime.now().timestamp()}"
     
+    async def find_document_by_hash(self, content_hash: str, email: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a previously processed upload with the same content for a user
+        
+        Args:
+            content_hash: SHA-256 hex digest of the uploaded file
+            email: User email the upload belongs to
+            
+        Returns:
+            Dict with the document metadata (including 'id') or None if not found
+        """
+        if not self.db:
+            return None
+        
+        try:
+            query = (
+                self.db.collection('documents')
+                .where('content_hash', '==', content_hash)
+                .where('email', '==', email)
+                .limit(1)
+            )
+            
+            documents = await self._run(self._collect, query)
+            return documents[0] if documents else None
+            
+        except Exception as e:
+            print(f"Failed to look up document by hash: {str(e)}")
+            return None
+    
     async def store_chat_history(
         self,
         email: str,
@@ -363,8 +517,7 @@ class FirebaseClient:
                 'response_length': len(ai_response)
             }
             
-            doc_ref = self.db.collection('chat_history').add(chat_data)
-            return doc_ref[1].id
+            return self._queue_write('chat_history', chat_data)
             
         except Exception as e:
             print(f"Failed to store chat history: {str(e)}")
@@ -377,15 +530,8 @@ class FirebaseClient:
         
         try:
             # Get all contracts from the secure collection
-            docs = self.db.collection('contracts').order_by('timestamp', direction='DESCENDING').limit(limit).stream()
-            
-            contracts = []
-            for doc in docs:
-                contract = doc.to_dict()
-                contract['id'] = doc.id
-                contracts.append(contract)
-            
-            return contracts
+            query = self.db.collection('contracts').order_by('timestamp', direction='DESCENDING').limit(limit)
+            return await self._run(self._collect, query)
             
         except Exception as e:
             print(f"Failed to retrieve contracts: {str(e)}")
@@ -404,15 +550,7 @@ class FirebaseClient:
                 .limit(limit)
             )
             
-            docs = query.stream()
-            history = []
-            
-            for doc in docs:
-                chat_data = doc.to_dict()
-                chat_data['id'] = doc.id
-                history.append(chat_data)
-            
-            return history
+            return await self._run(self._collect, query)
             
         except Exception as e:
             print(f"Failed to retrieve chat history: {str(e)}")
@@ -429,27 +567,17 @@ class FirebaseClient:
             return {"error": "Firebase not available"}
         
         try:
-            # Get total count of analyses
-            analyses_ref = self.db.collection('contract_analyses')
-            total_analyses = len(list(analyses_ref.stream()))
-            
-            # Get total documents uploaded
-            docs_ref = self.db.collection('documents')
-            total_documents = len(list(docs_ref.stream()))
-            
-            # Get total users
-            users_ref = self.db.collection('users')
-            total_users = len(list(users_ref.stream()))
-            
-            # Get total chat messages
-            chat_ref = self.db.collection('chat_history')
-            total_chats = len(list(chat_ref.stream()))
+            # Count analyses, uploaded documents, users and chat messages in parallel
+            total_analyses, total_documents, total_users, total_chats = await asyncio.gather(*(
+                self._run(self._collect, self.db.collection(name))
+                for name in ('contract_analyses', 'documents', 'users', 'chat_history')
+            ))
             
             return {
-                'total_analyses': total_analyses,
-                'total_documents': total_documents,
-                'total_users': total_users,
-                'total_chats': total_chats,
+                'total_analyses': len(total_analyses),
+                'total_documents': len(total_documents),
+                'total_users': len(total_users),
+                'total_chats': len(total_chats),
                 'last_updated': datetime.now(timezone.utc).isoformat()
             }
             
@@ -0,0 +1,50 @@
+from typing import Optional
+import httpx
+from openai import DefaultAsyncHttpxClient
+
+# One keep-alive pool per worker for outbound API calls; HTTP/2 lets
+# concurrent requests to the same host share a single connection
+_client: Optional[httpx.AsyncClient] = None
+# Separate pool for the OpenAI SDK, which needs its own (much longer) timeouts
+_openai_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared async HTTP client
+
+    Returns:
+        httpx.AsyncClient with HTTP/2 and connection pooling enabled
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=10,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+    return _client
+
+def get_openai_http_client() -> httpx.AsyncClient:
+    """
+    Return the HTTP client shared by every AsyncOpenAI instance in this worker
+
+    Returns:
+        httpx.AsyncClient with the SDK's default timeouts, HTTP/2 and connection pooling
+    """
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = DefaultAsyncHttpxClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+    return _openai_client
+
+async def close_http_client():
+    """Close the shared HTTP connection pools"""
+    global _client, _openai_client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _openai_client is not None:
+        await _openai_client.aclose()
+        _openai_client = None
@@ -2,8 +2,9 @@ import os
 import json
 import asyncio
 from typing import Dict, Any, Optional
-import requests
+import httpx
 from models.contract_analysis import ContractAnalysisResponse
+from services.http_client import get_http_client
 
 class NotificationService:
     """Service for sending notifications via n8n webhook and other channels"""
@@ -152,9 +153,8 @@ class NotificationService:
             return False
         
         try:
-            # Send webhook request
-            response = await asyncio.to_thread(
-                requests.post,
+            # Send webhook request over the shared keep-alive pool
+            response = await get_http_client().post(
                 self.n8n_webhook_url,
                 json=notification_data,
                 headers={
@@ -172,10 +172,10 @@ class NotificationService:
                 print(f"Webhook failed with status: {response.status_code}")
                 return False
                 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             print("Webhook request timed out")
             return False
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Webhook request failed: {str(e)}")
             return False
         except Exception as e:
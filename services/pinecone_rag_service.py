@@ -1,22 +1,103 @@
 import os
 import json
+import orjson
 import asyncio
 import hashlib
+import logging
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import tiktoken
-from openai import OpenAI
+from async_lru import alru_cache
+from openai import OpenAI, AsyncOpenAI
 from pinecone import Pinecone, ServerlessSpec
+from services.embedding_cache import EmbeddingCache
+from services.http_client import get_openai_http_client
+from services.redis_client import get_redis
+from utils.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+# Safety filter for ask_contract: off-topic words block a query unless it also
+# mentions a contract keyword (both matched in one Aho-Corasick pass)
+RAG_QUERY_FILTER = KeywordMatcher({
+    "non_contract": (
+        "weather", "joke", "recipe", "cook", "food", "movie", "music", "game",
+        "sports", "news", "time", "date", "math", "calculate", "translate",
+        "directions", "travel", "shopping", "restaurant", "hotel", "flight"
+    ),
+    "contract": ("contract", "agreement", "legal", "sla", "msa", "nda", "clause", "terms", "service level"),
+})
 
 class PineconeRAGService:
     """Persistent RAG service using Pinecone vector database"""
     
+    # Identical for every request so OpenAI's prompt prefix cache can match it;
+    # only the retrieved context and the question vary, and they come last
+    RAG_SYSTEM_PROMPT = """You are a friendly, experienced contract attorney who helps people understand their contracts in plain English. You're warm and approachable while being thorough and professional. Provide structured responses in JSON format, but write in a conversational, helpful tone.
+
+Based on the contract sections retrieved from our persistent knowledge base (provided in the next message) and the user's question, provide a comprehensive legal analysis.
+
+Please provide your analysis in the following JSON format:
+{
+    "risky_clauses": [
+        {
+            "clause": "<specific clause text or reference>",
+            "why": "<explanation of why this clause is risky>",
+            "severity": "<low|medium|high>"
+        }
+    ],
+    "missing_protections": [
+        {
+            "protection": "<type of protection that's missing>",
+            "why": "<explanation of why this protection is important>",
+            "suggested_language": "<suggested clause language>"
+        }
+    ],
+    "overall_risk_score": <integer from 1-10>,
+    "summary": "<comprehensive summary addressing the user's question>",
+    "notes": [
+        "<additional important observations or recommendations>"
+    ]
+}
+
+Focus on:
+1. Directly answering the user's question
+2. Identifying risks in the provided contract sections
+3. Suggesting missing protections relevant to the question
+4. Providing actionable recommendations
+
+If a jurisdiction or contract type is given, consider that jurisdiction's requirements and apply contract-specific analysis.
+
+IMPORTANT: Your response must cite sources using the format [Source: doc_id, chunk_id] for each fact or recommendation you provide based on the retrieved context."""
+
+    # Inputs per embeddings call; 256 full 800-token chunks stay under the
+    # API's per-request token limit, so only tune this downwards
+    EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "256"))
+    # Vectors per Pinecone upsert request
+    UPSERT_BATCH_SIZE = int(os.environ.get("PINECONE_UPSERT_BATCH_SIZE", "100"))
+    # Maximum ids per Pinecone fetch request
+    FETCH_BATCH_SIZE = 1000
+    # Duplicate-check queries in flight at once; each holds a default-executor
+    # thread, which file extraction and ask_contract also run on
+    DEDUP_QUERY_CONCURRENCY = 8
+    # Longest a cached retrieval can outlive the index contents: covers workers
+    # running without Redis, where upserts elsewhere aren't seen
+    SEARCH_CACHE_TTL = int(os.environ.get("RAG_SEARCH_CACHE_TTL", "300"))
+    
     def __init__(self):
         self.openai_client = OpenAI(
             api_key=os.environ.get("OPENAI_API_KEY")
         )
+        # Async client for callers running on the event loop; it shares the worker's
+        # HTTP/2 pool, so concurrent completions multiplex over one connection
+        self.openai_async_client = AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            http_client=get_openai_http_client()
+        )
         self.embedding_model = "text-embedding-3-small"
+        # Embeddings are deterministic per model, so each unique text is embedded once
+        self.embedding_cache = EmbeddingCache(self.embedding_model)
         self.chat_model = "gpt-4o-mini"
         self.tokenizer = tiktoken.get_encoding("cl100k_base")
         self.chunk_size = 800  # tokens per chunk as specified
@@ -27,6 +108,11 @@ class PineconeRAGService:
         self.index = None
         self.index_name = "contracts-rag"  # As specified
         self.dimension = 1536  # text-embedding-3-small dimension
+        # Bumped on every upsert; kept in Redis so every worker sees the change,
+        # this counter is only the fallback when Redis is unavailable
+        self.index_version = 0
+        self.index_version_key = f"rag_index_version:{self.index_name}"
+        self.redis = get_redis()
         
         # Initialize connection
         self._initialize_pinecone()
@@ -117,15 +203,25 @@ class PineconeRAGService:
         return chunks
     
     async def _get_embeddings(self, texts: List[str]) -> np.ndarray:
-        """Generate embeddings for multiple texts"""
+        """Generate embeddings for multiple texts, reusing cached vectors"""
+        return await self.embedding_cache.get_or_embed(texts, self._create_embeddings)
+    
+    async def _create_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Call the embeddings API for texts that are not cached, in concurrent batches"""
         try:
-            response = await asyncio.to_thread(
-                self.openai_client.embeddings.create,
-                model=self.embedding_model,
-                input=texts
-            )
+            batches = [
+                texts[i:i + self.EMBEDDING_BATCH_SIZE]
+                for i in range(0, len(texts), self.EMBEDDING_BATCH_SIZE)
+            ]
+            responses = await asyncio.gather(*(
+                self.openai_async_client.embeddings.create(
+                    model=self.embedding_model,
+                    input=batch
+                )
+                for batch in batches
+            ))
             
-            embeddings = np.array([data.embedding for data in response.data])
+            embeddings = np.array([data.embedding for response in responses for data in response.data])
             return embeddings.astype('float32')
             
         except Exception as e:
@@ -139,16 +235,22 @@ class PineconeRAGService:
         try:
             duplicate_indices = []
             
-            # Check each new embedding against existing ones
-            for i, embedding in enumerate(new_embeddings):
-                # Query Pinecone for similar vectors
-                search_results = self.index.query(
-                    vector=embedding.tolist(),
-                    top_k=3,  # Check top 3 most similar
-                    include_metadata=False,
-                    include_values=False
-                )
-                
+            # Query Pinecone for vectors similar to each new embedding, a few at a time
+            semaphore = asyncio.Semaphore(self.DEDUP_QUERY_CONCURRENCY)
+            
+            async def query_similar(embedding: np.ndarray):
+                async with semaphore:
+                    return await asyncio.to_thread(
+                        self.index.query,
+                        vector=embedding.tolist(),
+                        top_k=3,  # Check top 3 most similar
+                        include_metadata=False,
+                        include_values=False
+                    )
+            
+            all_results = await asyncio.gather(*(query_similar(embedding) for embedding in new_embeddings))
+            
+            for i, search_results in enumerate(all_results):
                 # Check if any result exceeds similarity threshold
                 matches = getattr(search_results, 'matches', [])
                 for match in matches:
@@ -170,11 +272,13 @@ class PineconeRAGService:
         
         try:
             existing_hashes = []
-            for chunk_hash in chunk_hashes:
+            # One fetch per batch of ids instead of one per chunk
+            for i in range(0, len(chunk_hashes), self.FETCH_BATCH_SIZE):
+                batch = chunk_hashes[i:i + self.FETCH_BATCH_SIZE]
                 try:
-                    result = self.index.fetch(ids=[chunk_hash])
-                    if result.vectors and chunk_hash in result.vectors:
-                        existing_hashes.append(chunk_hash)
+                    result = await asyncio.to_thread(self.index.fetch, ids=batch)
+                    if result.vectors:
+                        existing_hashes.extend(h for h in batch if h in result.vectors)
                 except:
                     continue
             
@@ -269,11 +373,9 @@ class PineconeRAGService:
                     "metadata": metadata
                 })
             
-            # Batch upload to Pinecone
-            batch_size = 100
-            for i in range(0, len(vectors), batch_size):
-                batch = vectors[i:i + batch_size]
-                self.index.upsert(vectors=batch)
+            # Batch upload to Pinecone (the SDK splits into UPSERT_BATCH_SIZE requests) off the event loop
+            await asyncio.to_thread(self.index.upsert, vectors=vectors, batch_size=self.UPSERT_BATCH_SIZE, show_progress=False)
+            await self._bump_index_version()
             
             return {
                 "status": "success",
@@ -299,42 +401,70 @@ class PineconeRAGService:
             return []
         
         try:
-            # Generate query embedding
-            query_embedding = await self._get_embeddings([query])
-            
-            # Search Pinecone for similar chunks
-            search_results = self.index.query(
-                vector=query_embedding[0].tolist(),
-                top_k=k,
-                include_metadata=True,
-                include_values=False
-            )
-            
-            # Format results with enhanced metadata
-            relevant_chunks = []
-            matches = getattr(search_results, 'matches', [])
-            for match in matches:
-                chunk_data = {
-                    "text": match.metadata.get("text", ""),
-                    "doc_id": match.metadata.get("doc_id", ""),
-                    "chunk_id": match.metadata.get("chunk_id", ""),
-                    "filename": match.metadata.get("filename", ""),
-                    "chunk_index": match.metadata.get("chunk_index", 0),
-                    "token_count": match.metadata.get("token_count", 0),
-                    "relevance_score": float(match.score),
-                    "upload_date": match.metadata.get("upload_date", ""),
-                    "uploaded_by": match.metadata.get("uploaded_by", ""),
-                    "jurisdiction": match.metadata.get("jurisdiction", ""),
-                    "contract_type": match.metadata.get("contract_type", "")
-                }
-                relevant_chunks.append(chunk_data)
-            
-            return relevant_chunks
-            
+            return await self._search_chunks(query, k, await self.get_index_version())
         except Exception as e:
             print(f"Failed to retrieve chunks from Pinecone: {str(e)}")
             return []
     
+    async def get_index_version(self) -> int:
+        """
+        Return the current index version, shared by all workers through Redis
+        
+        Returns:
+            Counter that changes whenever vectors are upserted
+        """
+        if self.redis is not None:
+            try:
+                return int(await self.redis.get(self.index_version_key) or 0)
+            except Exception as e:
+                logger.warning("Index version read failed: %s", e)
+        return self.index_version
+    
+    async def _bump_index_version(self):
+        """Mark the index as changed so cached retrievals and answers are not reused"""
+        self.index_version += 1
+        if self.redis is not None:
+            try:
+                await self.redis.incr(self.index_version_key)
+            except Exception as e:
+                logger.warning("Index version update failed: %s", e)
+    
+    @alru_cache(maxsize=512, ttl=SEARCH_CACHE_TTL)
+    async def _search_chunks(self, query: str, k: int, index_version: int) -> List[Dict[str, Any]]:
+        """Embed the query and search Pinecone; results are cached per index version"""
+        # Generate query embedding
+        query_embedding = await self._get_embeddings([query])
+        
+        # Search Pinecone for similar chunks
+        search_results = await asyncio.to_thread(
+            self.index.query,
+            vector=query_embedding[0].tolist(),
+            top_k=k,
+            include_metadata=True,
+            include_values=False
+        )
+        
+        # Format results with enhanced metadata
+        relevant_chunks = []
+        matches = getattr(search_results, 'matches', [])
+        for match in matches:
+            chunk_data = {
+                "text": match.metadata.get("text", ""),
+                "doc_id": match.metadata.get("doc_id", ""),
+                "chunk_id": match.metadata.get("chunk_id", ""),
+                "filename": match.metadata.get("filename", ""),
+                "chunk_index": match.metadata.get("chunk_index", 0),
+                "token_count": match.metadata.get("token_count", 0),
+                "relevance_score": float(match.score),
+                "upload_date": match.metadata.get("upload_date", ""),
+                "uploaded_by": match.metadata.get("uploaded_by", ""),
+                "jurisdiction": match.metadata.get("jurisdiction", ""),
+                "contract_type": match.metadata.get("contract_type", "")
+            }
+            relevant_chunks.append(chunk_data)
+        
+        return relevant_chunks
+    
     async def ask_contract(
         self, 
         query: str, 
@@ -347,17 +477,10 @@ class PineconeRAGService:
         try:
             # SAFETY FILTER: Block non-contract queries that should not reach RAG
             query_lower = query.lower().strip()
-            non_contract_indicators = [
-                "weather", "joke", "recipe", "cook", "food", "movie", "music", "game", 
-                "sports", "news", "time", "date", "math", "calculate", "translate",
-                "directions", "travel", "shopping", "restaurant", "hotel", "flight"
-            ]
+            matched = RAG_QUERY_FILTER.categories(query_lower)
             
             # Only block if definitely non-contract (no contract keywords present)
-            contract_keywords = ["contract", "agreement", "legal", "sla", "msa", "nda", "clause", "terms", "service level"]
-            is_contract_query = any(keyword in query_lower for keyword in contract_keywords)
-            
-            if any(indicator in query_lower for indicator in non_contract_indicators) and not is_contract_query:
+            if "non_contract" in matched and "contract" not in matched:
                 return {
                     "error": "FILTERED_NON_CONTRACT_QUERY",
                     "query_type": "non_contract", 
@@ -387,40 +510,34 @@ class PineconeRAGService:
                 global_practices_response = await self._get_global_best_practices_response(query, jurisdiction, contract_type)
                 return global_practices_response
             
-            # Build context from retrieved chunks
-            context = "\n\n".join([
+            # Build context from retrieved chunks in document order, so the same
+            # retrieval always yields a byte-identical, prompt-cacheable prefix
+            prompt_chunks = sorted(relevant_chunks, key=lambda c: (c["doc_id"], c["chunk_index"]))
+            context = "\n\n".join(
                 f"[Document Section {i+1} from {chunk['filename']}]:\n{chunk['text']}"
-                for i, chunk in enumerate(relevant_chunks)
-            ])
+                for i, chunk in enumerate(prompt_chunks)
+            )
             
-            # Build analysis prompt
-            prompt = self._build_rag_prompt(query, context, jurisdiction, contract_type)
+            # Build analysis messages
+            messages = self._build_rag_messages(query, context, jurisdiction, contract_type)
             
             # Call OpenAI API with GPT-4o mini
             response = await asyncio.to_thread(
                 self.openai_client.chat.completions.create,
                 model=self.chat_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a friendly, experienced contract attorney who helps people understand their contracts in plain English. You're warm and approachable while being thorough and professional. Provide structured responses in JSON format, but write in a conversational, helpful tone."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                messages=messages,
                 response_format={"type": "json_object"},
                 max_tokens=4000,
                 temperature=0.4  # As requested by user
             )
+            self._log_prompt_cache_usage(response)
             
             # Parse response
             content = response.choices[0].message.content
             if not content:
                 raise Exception("AI response was empty")
             
-            analysis_data = json.loads(content)
+            analysis_data = orjson.loads(content)
             
             # Convert to expected format
             return self._format_analysis_response_with_citations(analysis_data, relevant_chunks)
@@ -446,14 +563,14 @@ class PineconeRAGService:
                 "notes": []
             }
     
-    def _build_rag_prompt(
+    def _build_rag_messages(
         self, 
         query: str, 
         context: str, 
         jurisdiction: Optional[str] = None,
         contract_type: Optional[str] = None
-    ) -> str:
-        """Build RAG prompt with retrieved context from Pinecone"""
+    ) -> List[Dict[str, str]]:
+        """Build RAG chat messages: static system prompt, retrieved context, then the question"""
         
         context_info = ""
         if jurisdiction:
@@ -461,48 +578,21 @@ class PineconeRAGService:
         if contract_type:
             context_info += f"\nCONTRACT TYPE: {contract_type}"
         
-        return f"""
-        Based on the following contract sections retrieved from our persistent knowledge base and the user's question, provide a comprehensive legal analysis.{context_info}
-        
-        USER QUESTION: {query}
-        
-        RELEVANT CONTRACT SECTIONS:
-        {context}
-        
-        Please provide your analysis in the following JSON format:
-        {{
-            "risky_clauses": [
-                {{
-                    "clause": "<specific clause text or reference>",
-                    "why": "<explanation of why this clause is risky>",
-                    "severity": "<low|medium|high>"
-                }}
-            ],
-            "missing_protections": [
-                {{
-                    "protection": "<type of protection that's missing>",
-                    "why": "<explanation of why this protection is important>",
-                    "suggested_language": "<suggested clause language>"
-                }}
-            ],
-            "overall_risk_score": <integer from 1-10>,
-            "summary": "<comprehensive summary addressing the user's question>",
-            "notes": [
-                "<additional important observations or recommendations>"
-            ]
-        }}
-        
-        Focus on:
-        1. Directly answering the user's question
-        2. Identifying risks in the provided contract sections
-        3. Suggesting missing protections relevant to the question
-        4. Providing actionable recommendations
-        
-        {f"Consider {jurisdiction} jurisdiction requirements." if jurisdiction else ""}
-        {f"Apply {contract_type} contract-specific analysis." if contract_type else ""}
-        
-        IMPORTANT: Your response must cite sources using the format [Source: doc_id, chunk_id] for each fact or recommendation you provide based on the retrieved context.
-        """
+        return [
+            {"role": "system", "content": self.RAG_SYSTEM_PROMPT},
+            {"role": "system", "content": f"RELEVANT CONTRACT SECTIONS:\n{context}"},
+            {"role": "user", "content": f"USER QUESTION: {query}{context_info}"}
+        ]
+    
+    @staticmethod
+    def _log_prompt_cache_usage(response):
+        """Log how much of the prompt OpenAI served from its prefix cache"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", 0) or 0
+        logger.debug("RAG prompt cache: %s/%s prompt tokens cached", cached_tokens, usage.prompt_tokens)
     
     def _format_analysis_response(self, analysis_data: Dict[str, Any], chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Format analysis response to match expected schema"""
@@ -582,7 +672,7 @@ class PineconeRAGService:
             if not content:
                 raise Exception("AI response was empty")
             
-            analysis_data = json.loads(content)
+            analysis_data = orjson.loads(content)
             
             return {
                 "risky_clauses": analysis_data.get("risky_clauses", []),
@@ -666,6 +756,10 @@ class PineconeRAGService:
                 "index_name": self.index_name
             }
     
+    async def close(self):
+        """Close the sync OpenAI client's connections; the async client's pool is shared and closed by close_http_client()"""
+        await asyncio.to_thread(self.openai_client.close)
+    
     def is_available(self) -> bool:
         """Check if Pinecone service is available"""
         return self.index is not None
\ No newline at end of file
@@ -1,13 +1,57 @@
 import os
 import json
+import orjson
 import asyncio
 import numpy as np
+from string import Template
 from typing import List, Dict, Any, Optional, Tuple
 import tiktoken
 import faiss
 from openai import OpenAI
 from models.contract_analysis import ContractAnalysisResponse, RiskyClause, MissingProtection
 
+# Fixed RAG prompt scaffold; only the placeholders change per request
+RAG_PROMPT_TMPL = Template("""
+        Based on the following contract sections and the user's question, provide a comprehensive legal analysis.$context_info
+        
+        USER QUESTION: $query
+        
+        RELEVANT CONTRACT SECTIONS:
+        $context
+        
+        Please provide your analysis in the following JSON format:
+        {
+            "risky_clauses": [
+                {
+                    "clause": "<specific clause text or reference>",
+                    "why": "<explanation of why this clause is risky>",
+                    "severity": "<low|medium|high>"
+                }
+            ],
+            "missing_protections": [
+                {
+                    "protection": "<type of protection that's missing>",
+                    "why": "<explanation of why this protection is important>",
+                    "suggested_language": "<suggested clause language>"
+                }
+            ],
+            "overall_risk_score": <integer from 1-10>,
+            "summary": "<comprehensive summary addressing the user's question>",
+            "notes": [
+                "<additional important observations or recommendations>"
+            ]
+        }
+        
+        Focus on:
+        1. Directly answering the user's question
+        2. Identifying risks in the provided contract sections
+        3. Suggesting missing protections relevant to the question
+        4. Providing actionable recommendations
+        
+        $jurisdiction_note
+        $contract_type_note
+        """)
+
 class RAGService:
     """RAG service for contract analysis with FAISS vector storage"""
     
@@ -203,10 +247,10 @@ class RAGService:
                 }
             
             # Build context from retrieved chunks
-            context = "\n\n".join([
+            context = "\n\n".join(
                 f"[Document Section {i+1}]:\n{chunk['text']}"
                 for i, chunk in enumerate(relevant_chunks)
-            ])
+            )
             
             # Build analysis prompt
             prompt = self._build_rag_prompt(query, context, jurisdiction, contract_type)
@@ -235,7 +279,7 @@ class RAGService:
             if not content:
                 raise Exception("AI response was empty")
             
-            analysis_data = json.loads(content)
+            analysis_data = orjson.loads(content)
             
             # Convert to expected format
             return self._format_analysis_response(analysis_data, relevant_chunks)
@@ -276,46 +320,13 @@ class RAGService:
         if contract_type:
             context_info += f"\nCONTRACT TYPE: {contract_type}"
         
-        return f"""
-        Based on the following contract sections and the user's question, provide a comprehensive legal analysis.{context_info}
-        
-        USER QUESTION: {query}
-        
-        RELEVANT CONTRACT SECTIONS:
-        {context}
-        
-        Please provide your analysis in the following JSON format:
-        {{
-            "risky_clauses": [
-                {{
-                    "clause": "<specific clause text or reference>",
-                    "why": "<explanation of why this clause is risky>",
-                    "severity": "<low|medium|high>"
-                }}
-            ],
-            "missing_protections": [
-                {{
-                    "protection": "<type of protection that's missing>",
-                    "why": "<explanation of why this protection is important>",
-                    "suggested_language": "<suggested clause language>"
-                }}
-            ],
-            "overall_risk_score": <integer from 1-10>,
-            "summary": "<comprehensive summary addressing the user's question>",
-            "notes": [
-                "<additional important observations or recommendations>"
-            ]
-        }}
-        
-        Focus on:
-        1. Directly answering the user's question
-        2. Identifying risks in the provided contract sections
-        3. Suggesting missing protections relevant to the question
-        4. Providing actionable recommendations
-        
-        {f"Consider {jurisdiction} jurisdiction requirements." if jurisdiction else ""}
-        {f"Apply {contract_type} contract-specific analysis." if contract_type else ""}
-        """
+        return RAG_PROMPT_TMPL.substitute(
+            context_info=context_info,
+            query=query,
+            context=context,
+            jurisdiction_note=f"Consider {jurisdiction} jurisdiction requirements." if jurisdiction else "",
+            contract_type_note=f"Apply {contract_type} contract-specific analysis." if contract_type else ""
+        )
     
     def _format_analysis_response(self, analysis_data: Dict[str, Any], chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Format analysis response to match expected schema"""
@@ -0,0 +1,35 @@
+import os
+import logging
+from typing import Optional
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+# One connection pool per worker, shared by every Redis-backed feature
+_client: Optional[aioredis.Redis] = None
+_warned = False
+
+def get_redis() -> Optional[aioredis.Redis]:
+    """
+    Return the shared Redis client
+
+    Returns:
+        Redis client, or None when REDIS_URL is not set (callers fall back to per-process state)
+    """
+    global _client, _warned
+    if _client is None:
+        redis_url = os.environ.get("REDIS_URL")
+        if not redis_url:
+            if not _warned:
+                logger.warning("REDIS_URL not found. Caches and Telegram history will be per-process.")
+                _warned = True
+            return None
+        _client = aioredis.from_url(redis_url)
+    return _client
+
+async def close_redis():
+    """Close the shared Redis connection pool"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import string
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import orjson
+from services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# "What is an NDA?" and "what is an nda" share one cache key
+_STRIP_PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+class SemanticCache:
+    """LRU cache that reuses LLM answers for semantically similar queries
+
+    Similar-query matching is in-process; exact repeats are also shared across
+    workers through Redis when it is configured.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], Awaitable[np.ndarray]],
+        max_entries: int = 1024,
+        threshold: float = 0.95,
+        redis_ttl: int = 3600
+    ):
+        """
+        Args:
+            embed_fn: Async function returning an embedding matrix for a list of texts
+            max_entries: Maximum cached answers across all scopes before LRU eviction
+            threshold: Minimum cosine similarity for a cached answer to be reused
+            redis_ttl: Seconds an answer stays in the shared Redis tier
+        """
+        self._embed = embed_fn
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.redis = get_redis()
+        self.redis_ttl = redis_ttl
+        # One LRU for every scope, so scopes created from user-supplied context
+        # (or retired index versions) can't grow memory past max_entries:
+        # (scope, normalized query) -> (unit vector, answer), oldest first
+        self._entries: OrderedDict = OrderedDict()
+        # scope -> (entry keys, stacked unit vectors), rebuilt lazily after inserts
+        self._matrices: Dict[Tuple[str, str, str], Tuple[List[Tuple], np.ndarray]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _scope(namespace: str, jurisdiction: Optional[str], contract_type: Optional[str]) -> Tuple[str, str, str]:
+        """Answers are only shared between requests of the same kind and context"""
+        return (namespace, (jurisdiction or "").strip().lower(), (contract_type or "").strip().lower())
+
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(query.lower().translate(_STRIP_PUNCTUATION).split())
+
+    @staticmethod
+    def _redis_key(scope: Tuple[str, str, str], key: str) -> str:
+        digest = hashlib.sha1("|".join((*scope, key)).encode("utf-8")).hexdigest()
+        return f"semcache:{digest}"
+
+    def _matrix(self, scope: Tuple[str, str, str]) -> Tuple[List[Tuple], Optional[np.ndarray]]:
+        if scope not in self._matrices:
+            keys = [entry_key for entry_key in self._entries if entry_key[0] == scope]
+            matrix = np.stack([self._entries[entry_key][0] for entry_key in keys]) if keys else None
+            self._matrices[scope] = (keys, matrix)
+        return self._matrices[scope]
+
+    async def lookup(
+        self,
+        query: str,
+        namespace: str = "",
+        jurisdiction: Optional[str] = None,
+        contract_type: Optional[str] = None
+    ) -> Tuple[Optional[Any], Optional[np.ndarray]]:
+        """
+        Find a cached answer for the query or a semantically similar one
+
+        Args:
+            query: User's question
+            namespace: Kind of answer being cached (e.g. "chat", "telegram_rag")
+            jurisdiction: Optional jurisdiction context (part of the cache scope)
+            contract_type: Optional contract type context (part of the cache scope)
+
+        Returns:
+            Tuple of (cached answer or None, query vector to pass to store(); None if embedding failed)
+        """
+        scope = self._scope(namespace, jurisdiction, contract_type)
+        key = self._normalize_query(query)
+
+        # Exact repeats don't need an embedding call
+        entry = self._entries.get((scope, key))
+        if entry is not None:
+            self._entries.move_to_end((scope, key))
+            self.hits += 1
+            return entry[1], entry[0]
+
+        # Another worker may already have answered the exact same question
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(self._redis_key(scope, key))
+                if raw is not None:
+                    self.hits += 1
+                    return orjson.loads(raw), None
+            except Exception as e:
+                logger.warning("Semantic cache Redis read failed: %s", e)
+
+        try:
+            vector = (await self._embed([query]))[0].astype(np.float32)
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+        except Exception as e:
+            logger.warning("Semantic cache embedding failed: %s", e)
+            self.misses += 1
+            return None, None
+
+        # Read the scope now: it may have changed while the embedding was awaited
+        keys, matrix = self._matrix(scope)
+        if keys:
+            # Vectors are unit length, so the dot product is the cosine similarity
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] > self.threshold:
+                self._entries.move_to_end(keys[best])
+                self.hits += 1
+                return self._entries[keys[best]][1], vector
+
+        self.misses += 1
+        return None, vector
+
+    async def store(
+        self,
+        query: str,
+        vector: Optional[np.ndarray],
+        answer: Any,
+        namespace: str = "",
+        jurisdiction: Optional[str] = None,
+        contract_type: Optional[str] = None
+    ):
+        """Cache an answer under the query vector returned by lookup()"""
+        scope = self._scope(namespace, jurisdiction, contract_type)
+        key = self._normalize_query(query)
+
+        if self.redis is not None:
+            try:
+                await self.redis.setex(self._redis_key(scope, key), self.redis_ttl, orjson.dumps(answer))
+            except Exception as e:
+                logger.warning("Semantic cache Redis write failed: %s", e)
+
+        if vector is None:
+            return
+
+        self._entries[(scope, key)] = (vector, answer)
+        self._entries.move_to_end((scope, key))
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        # Evictions can touch any scope
+        self._matrices.clear()
+
+    async def get_or_compute(
+        self,
+        query: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        jurisdiction: Optional[str] = None,
+        contract_type: Optional[str] = None,
+        namespace: str = "general"
+    ) -> Dict[str, Any]:
+        """
+        Return a cached answer for a similar query, or compute and cache a new one
+
+        Args:
+            query: User's question
+            compute: Coroutine factory producing the LLM answer on a cache miss
+            jurisdiction: Optional jurisdiction context (part of the cache scope)
+            contract_type: Optional contract type context (part of the cache scope)
+            namespace: Kind of answer being cached
+
+        Returns:
+            Dict with the answer, either cached or freshly computed
+        """
+        cached, vector = await self.lookup(query, namespace, jurisdiction, contract_type)
+        if cached is not None:
+            return cached
+
+        result = await compute()
+        # Never cache failed responses
+        if "error" not in result:
+            await self.store(query, vector, result, namespace, jurisdiction, contract_type)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cache size and hit statistics"""
+        return {
+            "entries": len(self._entries),
+            "scopes": len({scope for scope, _ in self._entries}),
+            "hits": self.hits,
+            "misses": self.misses,
+            "threshold": self.threshold,
+            "shared": self.redis is not None
+        }
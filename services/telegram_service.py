@@ -2,11 +2,16 @@ import os
 import json
 import logging
 import asyncio
-from typing import Dict, Any, Optional
-import aiohttp
+import time
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Any, Optional
+import orjson
 from datetime import datetime
 from pathlib import Path
 from services.voice_legal_service import VoiceLegalService
+from services.redis_client import get_redis
+from services.http_client import get_http_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,14 +20,43 @@ logger = logging.getLogger(__name__)
 class TelegramService:
     """Service for handling Telegram bot interactions with RAG system"""
     
+    # Predefined dummy responses, keyed by the exact (lowercased) message
+    DUMMY_RESPONSES = {
+        "hello": "Hi! I'm Lexi, I help with legal stuff. What can I do for you?\n\n📄 **Upload contract documents** for detailed analysis and risk assessment!",
+        
+        "help": "🔍 Available Commands:\n\n• Ask me about contract terms\n• Request contract analysis\n• Ask legal questions\n• Type 'test' for a sample analysis\n\n💡 Tip: I work best when you upload contract documents first!\n\nDisclaimer: For informational use only. Please consult an attorney for your specific case.",
+        
+        "test": """📋 *Sample Contract Analysis*
+            
+🟡 *Risk Score*: 5/10
+
+*Analysis*:
+This is a test response showing how contract analysis would work. Key areas identified:
+
+• **Payment Terms**: 30-day payment terms are standard
+• **Liability**: Limited liability clauses present
+• **Termination**: Standard 30-day notice required
+
+📄 *Sources*: 3 document sections analyzed (dummy data)
+
+🔗 *References*: [Source: doc_abc123, chunk_001], [Source: doc_abc123, chunk_002]
+
+Disclaimer: For informational use only. Please consult an attorney for your specific case.""",
+        
+        "default": "🤖 I understand you're asking about contracts. While I'm ready to help, I'm currently operating in test mode. Once document ingestion is complete, I'll be able to provide detailed analysis based on your uploaded contracts!\n\n💡 Try typing 'help' to see what I can do!\n\nDisclaimer: For informational use only. Please consult an attorney for your specific case."
+    }
+    
     def __init__(self):
         self.bot_token = os.environ.get("TELEGRAM_BOT_TOKEN")
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
         
-        # Persistent conversation storage 
+        # Persistent conversation storage: Redis when configured, so every worker
+        # sees the same history; otherwise a local JSON file
+        self.redis = get_redis()
         self.conversation_file = "conversation_history.json"
-        self.conversation_history = self.load_conversations()
         self.max_history_length = 10  # Keep last 10 messages for context
+        self.conversation_history = self.load_conversations() if self.redis is None else {}
+        self.history_ttl_seconds = 24 * 3600
         
         # Initialize voice legal service for jargon explanations
         self.voice_legal_service = VoiceLegalService()
@@ -46,14 +80,13 @@ class TelegramService:
                 "action": "typing"
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    result = await response.json()
-                    
-                    if response.status == 200 and result.get("ok"):
-                        return {"success": True}
-                    else:
-                        return {"success": False, "error": result.get("description", "Unknown error")}
+            response = await get_http_client().post(url, json=payload)
+            result = response.json()
+
+            if response.status_code == 200 and result.get("ok"):
+                return {"success": True}
+            else:
+                return {"success": False, "error": result.get("description", "Unknown error")}
                         
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -113,36 +146,36 @@ class TelegramService:
         
         try:
             results = []
-            async with aiohttp.ClientSession() as session:
-                for i, part in enumerate(message_parts):
-                    url = f"{self.base_url}/sendMessage"
-                    payload = {
-                        "chat_id": chat_id,
-                        "text": part
-                    }
-                    
-                    async with session.post(url, json=payload) as response:
-                        result = await response.json()
-                        
-                        if response.status == 200 and result.get("ok"):
-                            results.append({
-                                "success": True, 
-                                "message_id": result["result"]["message_id"],
-                                "part": i + 1,
-                                "total_parts": len(message_parts)
-                            })
-                        else:
-                            error_msg = result.get("description", "Unknown error")
-                            logger.error(f"Failed to send message part {i+1}: {error_msg}")
-                            results.append({
-                                "success": False, 
-                                "error": error_msg,
-                                "part": i + 1
-                            })
-                    
-                    # Small delay between parts to avoid rate limiting
-                    if i < len(message_parts) - 1:
-                        await asyncio.sleep(0.5)
+            client = get_http_client()
+            for i, part in enumerate(message_parts):
+                url = f"{self.base_url}/sendMessage"
+                payload = {
+                    "chat_id": chat_id,
+                    "text": part
+                }
+
+                response = await client.post(url, json=payload)
+                result = response.json()
+
+                if response.status_code == 200 and result.get("ok"):
+                    results.append({
+                        "success": True,
+                        "message_id": result["result"]["message_id"],
+                        "part": i + 1,
+                        "total_parts": len(message_parts)
+                    })
+                else:
+                    error_msg = result.get("description", "Unknown error")
+                    logger.error(f"Failed to send message part {i+1}: {error_msg}")
+                    results.append({
+                        "success": False,
+                        "error": error_msg,
+                        "part": i + 1
+                    })
+
+                # Small delay between parts to avoid rate limiting
+                if i < len(message_parts) - 1:
+                    await asyncio.sleep(0.5)
             
             # Return success if all parts sent successfully
             all_success = all(r["success"] for r in results)
@@ -156,30 +189,55 @@ class TelegramService:
             logger.error(f"Exception sending Telegram message: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def add_to_conversation_history(self, chat_id: int, role: str, content: str):
+    @staticmethod
+    def _history_key(chat_id: int) -> str:
+        return f"tg:hist:{chat_id}"
+    
+    async def add_to_conversation_history(self, chat_id: int, role: str, content: str):
         """Add a message to conversation history"""
-        if chat_id not in self.conversation_history:
-            self.conversation_history[chat_id] = []
-        
-        self.conversation_history[chat_id].append({
+        message = {
             "role": role,  # "user" or "assistant"
             "content": content,
             "timestamp": datetime.now().isoformat()
-        })
+        }
         
-        # Keep only recent messages to avoid memory bloat
-        if len(self.conversation_history[chat_id]) > self.max_history_length:
-            self.conversation_history[chat_id] = self.conversation_history[chat_id][-self.max_history_length:]
+        if self.redis is not None:
+            try:
+                # Append, keep only the most recent messages and refresh the expiry in one round trip
+                key = self._history_key(chat_id)
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.rpush(key, orjson.dumps(message))
+                    pipe.ltrim(key, -self.max_history_length, -1)
+                    pipe.expire(key, self.history_ttl_seconds)
+                    await pipe.execute()
+            except Exception as e:
+                logger.error(f"Error saving conversation to Redis: {e}")
+            return
+        
+        if chat_id not in self.conversation_history:
+            # Bounded, so the oldest message drops out as a new one is appended
+            self.conversation_history[chat_id] = deque(maxlen=self.max_history_length)
+        
+        self.conversation_history[chat_id].append(message)
         
         # Save to file after each addition
         self.save_conversations()
     
-    def get_conversation_context(self, chat_id: int, max_messages: int = 6) -> str:
+    async def get_conversation_context(self, chat_id: int, max_messages: int = 6) -> str:
         """Get recent conversation history as context string"""
-        if chat_id not in self.conversation_history:
+        if self.redis is not None:
+            try:
+                raw_messages = await self.redis.lrange(self._history_key(chat_id), -max_messages, -1)
+            except Exception as e:
+                logger.error(f"Error loading conversation from Redis: {e}")
+                return ""
+            recent_messages = [orjson.loads(raw) for raw in raw_messages]
+        elif chat_id in self.conversation_history:
+            history = self.conversation_history[chat_id]
+            recent_messages = islice(history, max(len(history) - max_messages, 0), None)
+        else:
             return ""
         
-        recent_messages = self.conversation_history[chat_id][-max_messages:]
         context_parts = []
         
         for msg in recent_messages:
@@ -193,14 +251,14 @@ class TelegramService:
         """Get standard legal disclaimer for all responses"""
         return "\n\nDisclaimer: For informational use only. Please consult an attorney for your specific case."
     
-    def load_conversations(self) -> Dict[int, list]:
+    def load_conversations(self) -> Dict[int, Deque[Dict[str, Any]]]:
         """Load conversation history from file"""
         try:
             if Path(self.conversation_file).exists():
                 with open(self.conversation_file, 'r') as f:
                     data = json.load(f)
                     # Convert string keys back to integers
-                    return {int(k): v for k, v in data.items()}
+                    return {int(k): deque(v, maxlen=self.max_history_length) for k, v in data.items()}
             return {}
         except Exception as e:
             logger.error(f"Error loading conversations: {e}")
@@ -210,7 +268,7 @@ class TelegramService:
         """Save conversation history to file"""
         try:
             # Convert int keys to strings for JSON serialization
-            data = {str(k): v for k, v in self.conversation_history.items()}
+            data = {str(k): list(v) for k, v in self.conversation_history.items()}
             with open(self.conversation_file, 'w') as f:
                 json.dump(data, f, indent=2)
         except Exception as e:
@@ -229,16 +287,15 @@ class TelegramService:
                 "text": text[:4096]
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    result = await response.json()
-                    
-                    if response.status == 200 and result.get("ok"):
-                        return {"success": True}
-                    else:
-                        error_msg = result.get("description", "Unknown error")
-                        logger.error(f"Failed to edit message: {error_msg}")
-                        return {"success": False, "error": error_msg}
+            response = await get_http_client().post(url, json=payload)
+            result = response.json()
+
+            if response.status_code == 200 and result.get("ok"):
+                return {"success": True}
+            else:
+                error_msg = result.get("description", "Unknown error")
+                logger.error(f"Failed to edit message: {error_msg}")
+                return {"success": False, "error": error_msg}
                         
         except Exception as e:
             logger.error(f"Exception editing message: {str(e)}")
@@ -253,17 +310,16 @@ class TelegramService:
             url = f"{self.base_url}/setWebhook"
             payload = {"url": webhook_url}
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    result = await response.json()
-                    
-                    if response.status == 200 and result.get("ok"):
-                        logger.info(f"Webhook set successfully to {webhook_url}")
-                        return {"success": True, "webhook_url": webhook_url}
-                    else:
-                        error_msg = result.get("description", "Unknown error")
-                        logger.error(f"Failed to set webhook: {error_msg}")
-                        return {"success": False, "error": error_msg}
+            response = await get_http_client().post(url, json=payload)
+            result = response.json()
+
+            if response.status_code == 200 and result.get("ok"):
+                logger.info(f"Webhook set successfully to {webhook_url}")
+                return {"success": True, "webhook_url": webhook_url}
+            else:
+                error_msg = result.get("description", "Unknown error")
+                logger.error(f"Failed to set webhook: {error_msg}")
+                return {"success": False, "error": error_msg}
                         
         except Exception as e:
             logger.error(f"Exception setting webhook: {str(e)}")
@@ -277,17 +333,16 @@ class TelegramService:
         try:
             url = f"{self.base_url}/getWebhookInfo"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    result = await response.json()
-                    
-                    if response.status == 200 and result.get("ok"):
-                        webhook_info = result["result"]
-                        logger.info(f"Webhook info retrieved: {webhook_info.get('url', 'No webhook set')}")
-                        return {"success": True, "webhook_info": webhook_info}
-                    else:
-                        error_msg = result.get("description", "Unknown error")
-                        return {"success": False, "error": error_msg}
+            response = await get_http_client().get(url)
+            result = response.json()
+
+            if response.status_code == 200 and result.get("ok"):
+                webhook_info = result["result"]
+                logger.info(f"Webhook info retrieved: {webhook_info.get('url', 'No webhook set')}")
+                return {"success": True, "webhook_info": webhook_info}
+            else:
+                error_msg = result.get("description", "Unknown error")
+                return {"success": False, "error": error_msg}
                         
         except Exception as e:
             logger.error(f"Exception getting webhook info: {str(e)}")
@@ -449,30 +504,7 @@ Disclaimer: For informational use only. Please consult an attorney for your spec
     
     def get_dummy_responses(self) -> Dict[str, str]:
         """Get predefined dummy responses for testing"""
-        return {
-            "hello": "Hi! I'm Lexi, I help with legal stuff. What can I do for you?\n\n📄 **Upload contract documents** for detailed analysis and risk assessment!",
-            
-            "help": "🔍 Available Commands:\n\n• Ask me about contract terms\n• Request contract analysis\n• Ask legal questions\n• Type 'test' for a sample analysis\n\n💡 Tip: I work best when you upload contract documents first!\n\nDisclaimer: For informational use only. Please consult an attorney for your specific case.",
-            
-            "test": """📋 *Sample Contract Analysis*
-            
-🟡 *Risk Score*: 5/10
-
-*Analysis*:
-This is a test response showing how contract analysis would work. Key areas identified:
-
-• **Payment Terms**: 30-day payment terms are standard
-• **Liability**: Limited liability clauses present
-• **Termination**: Standard 30-day notice required
-
-📄 *Sources*: 3 document sections analyzed (dummy data)
-
-🔗 *References*: [Source: doc_abc123, chunk_001], [Source: doc_abc123, chunk_002]
-
-Disclaimer: For informational use only. Please consult an attorney for your specific case.""",
-            
-            "default": "🤖 I understand you're asking about contracts. While I'm ready to help, I'm currently operating in test mode. Once document ingestion is complete, I'll be able to provide detailed analysis based on your uploaded contracts!\n\n💡 Try typing 'help' to see what I can do!\n\nDisclaimer: For informational use only. Please consult an attorney for your specific case."
-        }
+        return self.DUMMY_RESPONSES
     
     async def send_generating_response(self, chat_id: int, user_query: str) -> Dict[str, Any]:
         """Send typing indicator and a 'generating response' message"""
@@ -569,4 +601,52 @@ Disclaimer: For informational use only. Please consult an attorney for your spec
             
         except Exception as e:
             logger.error(f"Error handling legal term query: {str(e)}")
-            return f"❌ Sorry, I had trouble explaining that legal term. Please try again."
\ No newline at end of file
+            return f"❌ Sorry, I had trouble explaining that legal term. Please try again."
+
+
+class TelegramReplyStream:
+    """Shows a reply in a chat while it is being generated, then replaces it with the final text"""
+    
+    # Telegram rate-limits message edits; one update per second stays well inside it
+    UPDATE_INTERVAL_SECONDS = 1.0
+    
+    def __init__(self, telegram_service: TelegramService, chat_id: int):
+        self.telegram_service = telegram_service
+        self.chat_id = chat_id
+        self.message_id: Optional[int] = None
+        self._shown_text = ""
+        self._last_update = 0.0
+    
+    async def update(self, text: str):
+        """Show the partial reply: the first call sends a message, later calls edit it"""
+        now = time.monotonic()
+        if not text.strip() or now - self._last_update < self.UPDATE_INTERVAL_SECONDS:
+            return
+        self._last_update = now
+        text = text[:4096]
+        
+        if self.message_id is None:
+            result = await self.telegram_service.send_message(self.chat_id, text)
+            if result.get("success"):
+                self.message_id = result["results"][0]["message_id"]
+                self._shown_text = text
+        else:
+            result = await self.telegram_service.edit_message(self.chat_id, self.message_id, text)
+            if result.get("success"):
+                self._shown_text = text
+    
+    async def finish(self, text: str) -> Dict[str, Any]:
+        """Deliver the final reply, editing the partial message if one was sent"""
+        if self.message_id is None:
+            return await self.telegram_service.send_message(self.chat_id, text)
+        
+        message_parts = self.telegram_service.split_long_message(text)
+        # Telegram rejects edits that don't change the text
+        if message_parts[0] != self._shown_text:
+            result = await self.telegram_service.edit_message(self.chat_id, self.message_id, message_parts[0])
+            if not result.get("success"):
+                return result
+        
+        if len(message_parts) > 1:
+            return await self.telegram_service.send_message(self.chat_id, "\n\n".join(message_parts[1:]))
+        return {"success": True, "parts": 1}
@@ -98,7 +98,8 @@ When someone asks about legal terms:
 Be helpful and encouraging - legal language doesn't have to be intimidating!{context_info}"""
 
             # Get AI explanation
-            response = self.openai_client.chat.completions.create(
+            response = await asyncio.to_thread(
+                self.openai_client.chat.completions.create,
                 model=self.chat_model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -162,7 +163,8 @@ Be helpful and encouraging - legal language doesn't have to be intimidating!{con
             Keep it conversational and easy to follow when heard aloud. Focus on the key point."""
             
             try:
-                voice_response = self.openai_client.chat.completions.create(
+                voice_response = await asyncio.to_thread(
+                    self.openai_client.chat.completions.create,
                     model=self.chat_model,
                     messages=[
                         {"role": "system", "content": system_prompt},
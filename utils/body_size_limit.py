@@ -0,0 +1,48 @@
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies over a byte limit while they are still being received
+
+    Starlette spools a multipart upload completely before the endpoint runs, so
+    checks inside a handler only fire once the whole body is on disk. This stops
+    reading as soon as the limit is passed.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        """
+        Args:
+            app: The ASGI app to wrap
+            max_body_size: Largest accepted request body in bytes
+        """
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # A declared length over the limit is refused without reading anything
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_body_size:
+                    response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                # The header can be missing (chunked uploads) or wrong
+                if received > self.max_body_size:
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
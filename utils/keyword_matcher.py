@@ -0,0 +1,40 @@
+from typing import Dict, Iterable, FrozenSet
+import ahocorasick
+
+class KeywordMatcher:
+    """Find which keyword categories occur in a text with a single Aho-Corasick pass"""
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        """
+        Args:
+            categories: Mapping of category name to the keywords that belong to it
+        """
+        self._automaton = ahocorasick.Automaton()
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                # A keyword can belong to several categories
+                tags = self._automaton.get(keyword, frozenset())
+                self._automaton.add_word(keyword, tags | {category})
+        self._automaton.make_automaton()
+
+    def categories(self, text: str) -> FrozenSet[str]:
+        """
+        Return every category with at least one keyword occurring in the text
+
+        Matching is by substring, the same as `keyword in text`; callers
+        should lowercase the text first.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Frozenset of matched category names
+        """
+        found = set()
+        for _, tags in self._automaton.iter(text):
+            found |= tags
+        return frozenset(found)
+
+    def matches(self, text: str) -> bool:
+        """Return True if any keyword occurs in the text, stopping at the first hit"""
+        return next(self._automaton.iter(text), None) is not None
@@ -0,0 +1,31 @@
+import threading
+from typing import Any, Callable
+
+class LazyService:
+    """Proxy that builds a service on first use and forwards attribute access to it"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        """
+        Args:
+            factory: Zero-argument callable that constructs the service
+        """
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_initialized(self) -> bool:
+        """Whether the service has been constructed yet"""
+        return self._instance is not None
+
+    def get(self) -> Any:
+        """Return the service, constructing it on the first call"""
+        if self._instance is None:
+            # Endpoints may hit a cold service from worker threads at the same time
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
@@ -2,6 +2,8 @@ import re
 from typing import List, Optional
 from pathlib import Path
 
+ALLOWED_FILE_EXTENSIONS = frozenset({'.pdf', '.docx'})
+
 def validate_file_type(filename: str) -> bool:
     """
     Validate if the uploaded file type is supported
@@ -15,10 +17,7 @@ def validate_file_type(filename: str) -> bool:
     if not filename:
         return False
     
-    allowed_extensions = {'.pdf', '.docx'}
-    file_extension = Path(filename).suffix.lower()
-    
-    return file_extension in allowed_extensions
+    return Path(filename).suffix.lower() in ALLOWED_FILE_EXTENSIONS
 
 def validate_email(email: str) -> bool:
     """